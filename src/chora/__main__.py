@@ -22,9 +22,20 @@ def main() -> None:
     print("Starting chora server...")
     print(f"  Root directory: {root_path.absolute()}")
     print(f"  Server address: http://{args.host}:{args.port}")
+    if args.asgi:
+        print("  Serving with uvicorn (ASGI)")
+    else:
+        print(f"  Worker threads: {args.threads}")
     print("  Press Ctrl+C to stop the server")
 
-    start_server(root_path, args.host, args.port)
+    start_server(
+        root_path,
+        args.host,
+        args.port,
+        args.threads,
+        asgi=args.asgi,
+        reuse_port=args.reuse_port,
+    )
 
 
 if __name__ == "__main__":
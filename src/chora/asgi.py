@@ -0,0 +1,217 @@
+"""
+ASGI application for chora server.
+
+Serves the same file system structure as ChoraHTTPRequestHandler, but on an
+event loop, so slow HANDLE scripts don't tie up a thread per connection. Run it
+with start_asgi_server, which needs the optional uvicorn dependency.
+"""
+
+import asyncio
+import os
+import subprocess
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from .dynamic import MAX_HANDLE_CHAIN, request_digest, resolve_handle_async
+from .handler import (
+    FRAMING_HEADERS,
+    FileBody,
+    find_directory,
+    is_within,
+    read_static,
+    response_has_body,
+    route_tree,
+    scratch_dirs,
+)
+from .pool import handler_pool
+
+Scope = dict[str, Any]
+Message = dict[str, Any]
+Receive = Callable[[], Awaitable[Message]]
+Send = Callable[[Message], Awaitable[None]]
+
+
+class ChoraASGIApp:
+    """ASGI application that serves responses based on file system structure."""
+
+    def __init__(self, root_dir: str | Path) -> None:
+        self.root_dir = os.fspath(root_dir)
+        route_tree(self.root_dir)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        method = scope["method"]
+        body = await self._read_body(receive)
+        try:
+            status_code, data, headers = await self._handle_request(scope, body)
+            print(f"{method} {scope['path']} -> {status_code}")
+
+        except FileNotFoundError:
+            status_code, data, headers = self._error_response(scope, 404, "Not Found")
+
+        except PermissionError:
+            status_code, data, headers = self._error_response(scope, 403, "Forbidden")
+
+        except subprocess.TimeoutExpired:
+            status_code, data, headers = self._error_response(
+                scope, 504, "Gateway Timeout"
+            )
+
+        except (ValueError, subprocess.CalledProcessError) as e:
+            status_code, data, headers = self._error_response(
+                scope, 500, f"Internal Server Error: {str(e)}"
+            )
+
+        response_headers = [
+            (key.lower().encode("latin-1"), value.encode("latin-1"))
+            for key, value in headers.items()
+            if key.lower() not in FRAMING_HEADERS
+        ]
+        if response_has_body(status_code):
+            response_headers.append((b"content-length", str(len(data)).encode()))
+        else:
+            data = b""
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": response_headers,
+            }
+        )
+        await send(
+            {"type": "http.response.body", "body": b"" if method == "HEAD" else data}
+        )
+
+    async def _lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive: Receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        return b"".join(chunks)
+
+    async def _handle_request(
+        self, scope: Scope, body: bytes
+    ) -> tuple[int, bytes, dict[str, str]]:
+        # Route on the path as received, percent-encoding and all, just like
+        # ChoraHTTPRequestHandler does with self.path.
+        raw_path = scope.get("raw_path")
+        path = (raw_path.decode("latin-1") if raw_path else scope["path"]).strip("/")
+        directory = find_directory(
+            self.root_dir, os.path.join(self.root_dir, path, scope["method"])
+        )
+        if not directory:
+            raise FileNotFoundError(f"Directory not found: {path}")
+
+        if os.path.exists(os.path.join(directory, "HANDLE")):
+            # The response is read before the scratch directory is handed back,
+            # since the script may have written it there.
+            with scratch_dirs.checkout() as tmpdir:
+                digest = self._cache_request(Path(tmpdir), scope, body)
+                depth = 0
+                while os.path.exists(os.path.join(directory, "HANDLE")):
+                    if depth >= MAX_HANDLE_CHAIN:
+                        raise ValueError(
+                            f"More than {MAX_HANDLE_CHAIN} chained HANDLE scripts "
+                            f"at {directory}"
+                        )
+                    directory = await self._run_handler(directory, tmpdir, digest)
+                    depth += 1
+                return await self._read_static(directory, tmpdir)
+
+        return await self._read_static(directory)
+
+    async def _read_static(
+        self, directory: str, tmpdir: str = ""
+    ) -> tuple[int, bytes, dict[str, str]]:
+        # Static responses are cached and small, so they are read on the loop;
+        # large bodies left on disk are read off it.
+        status_code, data, headers = read_static(
+            directory, cache=not is_within(directory, tmpdir)
+        )
+        if isinstance(data, FileBody):
+            data = await asyncio.get_running_loop().run_in_executor(None, data.read)
+        return status_code, data, headers
+
+    def _cache_request(self, tmpdir: Path, scope: Scope, body: bytes) -> bytes:
+        """Write the request out for HANDLE scripts and return its digest.
+
+        Header names are written as the ASGI server hands them over, which is
+        lowercased, unlike the threaded server which keeps the client's case.
+        """
+        target = scope.get("raw_path") or scope["path"].encode()
+        if scope.get("query_string"):
+            target += b"?" + scope["query_string"]
+        requestline = (
+            f"{scope['method']} {target.decode('latin-1')} "
+            f"HTTP/{scope.get('http_version', '1.1')}"
+        ).encode("latin-1")
+        (tmpdir / "REQUEST").write_bytes(requestline)
+
+        headers = b"".join(
+            key + b": " + value + b"\n" for key, value in scope["headers"]
+        )
+        (tmpdir / "HEADERS").write_bytes(headers)
+        (tmpdir / "DATA").write_bytes(body)
+        return request_digest(requestline, headers, body)
+
+    async def _run_handler(self, directory: str, tmpdir: str, digest: bytes) -> str:
+        response_dir = await resolve_handle_async(
+            directory, tmpdir, digest, self._execute
+        )
+        found = find_directory(self.root_dir, response_dir)
+        if not found:
+            raise FileNotFoundError(f"Directory not found: {response_dir}")
+        return found
+
+    async def _execute(self, script: str, tmpdir: str, persistent: bool) -> str:
+        if persistent:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, handler_pool.run, script, tmpdir)
+
+        proc = await asyncio.create_subprocess_exec(
+            script,
+            tmpdir,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await proc.communicate()
+        if proc.returncode:
+            raise subprocess.CalledProcessError(
+                proc.returncode, [script, tmpdir], stdout, stderr
+            )
+        return stdout.decode()
+
+    def _error_response(
+        self, scope: Scope, status_code: int, message: str
+    ) -> tuple[int, bytes, dict[str, str]]:
+        print(f"ERROR {scope['path']} -> {status_code}: {message}")
+        return status_code, message.encode(), {"Content-Type": "text/plain"}
+
+
+def start_asgi_server(root_path: Path, host: str, port: int) -> None:
+    """Serve root_path with uvicorn.
+
+    Raises:
+        ImportError: If uvicorn is not installed
+    """
+    import uvicorn
+
+    uvicorn.run(ChoraASGIApp(root_path), host=host, port=port, log_level="warning")
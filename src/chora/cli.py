@@ -2,6 +2,8 @@ import argparse
 import tomllib
 from pathlib import Path
 
+from .server import DEFAULT_THREADS
+
 
 def load_config_from_file(pyproject_path: Path) -> dict:
     """Load configuration from pyproject.toml file.
@@ -20,11 +22,25 @@ def load_config_from_file(pyproject_path: Path) -> dict:
         return {}
 
 
+def positive_int(value: str) -> int:
+    """Argparse type for a count that must be at least one."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
 def parse_arguments() -> argparse.Namespace:
     defaults = {
         "root": "./chora-root",
         "port": 8000,
         "host": "localhost",
+        "threads": DEFAULT_THREADS,
+        "asgi": False,
+        "reuse_port": False,
     }
 
     # TODO: make this configurable
@@ -53,5 +69,24 @@ def parse_arguments() -> argparse.Namespace:
         default=defaults["host"],
         help=f"Host to bind the server to (default: {defaults['host']})",
     )
+    parser.add_argument(
+        "--threads",
+        type=positive_int,
+        # A string default goes through positive_int too, checking pyproject.toml.
+        default=str(defaults["threads"]),
+        help=f"Maximum number of requests handled concurrently (default: {defaults['threads']})",
+    )
+    parser.add_argument(
+        "--asgi",
+        action=argparse.BooleanOptionalAction,
+        default=defaults["asgi"],
+        help="Serve with uvicorn on an event loop, if installed (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--reuse-port",
+        action=argparse.BooleanOptionalAction,
+        default=defaults["reuse_port"],
+        help="Let several chora processes share the port (default: %(default)s)",
+    )
 
     return parser.parse_args()
@@ -0,0 +1,156 @@
+"""
+HANDLE script resolution shared by chora's front ends.
+
+ChoraHTTPRequestHandler and ChoraASGIApp differ only in how they run a HANDLE
+script. The checks before it runs, the HANDLE.cache lookup and the mapping of
+its output onto a response directory live here.
+"""
+
+import hashlib
+import math
+import os
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable
+
+from .pool import PERSISTENT_MARKER, handler_pool
+
+CACHE_MARKER = "HANDLE.cache"
+# How many HANDLE scripts one request may pass through, so a script that
+# answers with its own folder can't loop forever.
+MAX_HANDLE_CHAIN = 16
+
+
+def request_digest(requestline: bytes, headers: bytes, body: bytes) -> bytes:
+    """Fingerprint everything a HANDLE script can see about a request."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (requestline, headers, body):
+        digest.update(len(part).to_bytes(8, "little"))
+        digest.update(part)
+    return digest.digest()
+
+
+class _HandleOutputCache:
+    """Remembers what cacheable HANDLE scripts answered for a given request.
+
+    A script opts in with a HANDLE.cache file next to it. An empty file caches
+    answers until the script is edited; a number caches them for that many
+    seconds.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple, tuple[str, float]] = OrderedDict()
+
+    def key(self, directory: str, handler: str, digest: bytes) -> tuple | None:
+        """Return the cache key for a request, or None if it isn't cacheable."""
+        marker = os.path.join(directory, CACHE_MARKER)
+        if not os.path.exists(marker):
+            return None
+        with open(marker, "rb") as f:
+            ttl_text = f.read().strip()
+        ttl = float(ttl_text) if ttl_text else None
+        if ttl is not None and not (math.isfinite(ttl) and ttl >= 0):
+            raise ValueError(f"invalid {CACHE_MARKER} lifetime: {ttl_text.decode()}")
+        st = os.stat(handler)
+        return (handler, st.st_mtime_ns, st.st_size, digest, ttl)
+
+    def get(self, key: tuple) -> str | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            output, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return output
+
+    def put(self, key: tuple, output: str) -> None:
+        ttl = key[-1]
+        expires = time.monotonic() + ttl if ttl is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (output, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_handle_outputs = _HandleOutputCache()
+
+
+def run_handle(script: str, tmpdir: str, persistent: bool) -> str:
+    """Run a HANDLE script on the request in tmpdir and return what it printed."""
+    if persistent:
+        return handler_pool.run(script, tmpdir)
+
+    proc = subprocess.run([script, tmpdir], capture_output=True, text=True, check=True)
+    return proc.stdout
+
+
+class HandleCall:
+    """One request to the HANDLE script in directory.
+
+    cached holds the script's earlier answer to the same request, when its
+    HANDLE.cache allows that; otherwise the caller runs script and passes what
+    it printed to response_dir.
+
+    Raises:
+        PermissionError: If the script is not executable
+    """
+
+    def __init__(self, directory: str, digest: bytes) -> None:
+        self.script = os.path.abspath(os.path.join(directory, "HANDLE"))
+        if not os.access(self.script, os.X_OK):
+            raise PermissionError(f"HANDLE script is not executable: {self.script}")
+
+        self.persistent = os.path.exists(os.path.join(directory, PERSISTENT_MARKER))
+        self._key = _handle_outputs.key(directory, self.script, digest)
+        self.cached = _handle_outputs.get(self._key) if self._key else None
+
+    def response_dir(self, output: str) -> str:
+        """Remember the script's output if cacheable and return the directory."""
+        output = output.strip()
+        if self._key and self.cached is None:
+            _handle_outputs.put(self._key, output)
+
+        # An absolute output wins; a relative one is taken from the script.
+        response_dir = os.path.join(os.path.dirname(self.script), output)
+        print(f"Dynamic handler output: {response_dir}")
+        return response_dir
+
+
+def resolve_handle(
+    directory: str,
+    tmpdir: str,
+    digest: bytes,
+    execute: Callable[[str, str, bool], str] = run_handle,
+) -> str:
+    """Return the response directory the HANDLE script in directory picks."""
+    call = HandleCall(directory, digest)
+    output = call.cached
+    if output is None:
+        output = execute(call.script, tmpdir, call.persistent)
+    return call.response_dir(output)
+
+
+async def resolve_handle_async(
+    directory: str,
+    tmpdir: str,
+    digest: bytes,
+    execute: Callable[[str, str, bool], Awaitable[str]],
+) -> str:
+    """Like resolve_handle, for an executor that runs on an event loop."""
+    call = HandleCall(directory, digest)
+    output = call.cached
+    if output is None:
+        output = await execute(call.script, tmpdir, call.persistent)
+    return call.response_dir(output)
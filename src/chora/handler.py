@@ -2,19 +2,343 @@
 HTTP request handler for chora server.
 """
 
+import atexit
 import os
+import shutil
 import subprocess
 import tempfile
-from functools import partial
+import threading
+from contextlib import ExitStack, contextmanager, nullcontext
+from functools import lru_cache, partial
 from http.server import BaseHTTPRequestHandler
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Iterator
 from urllib.parse import urlparse
 
+from .dynamic import MAX_HANDLE_CHAIN, request_digest, resolve_handle
+
+STATIC_FILES = ("STATUS", "DATA", "HEADERS")
+REQUEST_FILES = ("REQUEST", "HEADERS", "DATA")
+FRAMING_HEADERS = ("content-length", "transfer-encoding")
+# DATA files larger than this are sent straight from disk, not held in memory.
+SENDFILE_THRESHOLD = 64 * 1024
+
+
+def response_has_body(status_code: int) -> bool:
+    """Whether a response may carry a body; 1xx, 204 and 304 never do."""
+    return status_code >= 200 and status_code not in (204, 304)
+
+
+def _slurp(path: str | Path) -> bytes:
+    """Read a whole file with one read sized by fstat, bypassing buffered IO."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        data = os.read(fd, size)
+        while len(data) < size:
+            chunk = os.read(fd, size - len(data))
+            if not chunk:
+                break
+            data += chunk
+        return data
+    finally:
+        os.close(fd)
+
+
+def _spit(path: str | Path, data: bytes) -> None:
+    """Write a whole file, truncating it first, bypassing buffered IO."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+    finally:
+        os.close(fd)
+
+
+class _ScratchDirs:
+    """Recycles the directories that requests are written to for HANDLE scripts.
+
+    A directory is only handed to one request at a time. Request files are
+    overwritten in place, and anything else a script leaves behind is removed
+    before the directory is reused.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._free: list[str] = []
+
+    @contextmanager
+    def checkout(self) -> Iterator[str]:
+        with self._lock:
+            path = self._free.pop() if self._free else None
+        # Something like a tmp cleaner may have removed an idle directory.
+        if path is None or not os.path.isdir(path):
+            path = tempfile.mkdtemp(prefix="chora_")
+
+        try:
+            yield path
+        finally:
+            try:
+                self._tidy(path)
+            except OSError:
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                with self._lock:
+                    self._free.append(path)
+
+    def close(self) -> None:
+        with self._lock:
+            paths, self._free = self._free, []
+        for path in paths:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _tidy(self, path: str) -> None:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.name in REQUEST_FILES and entry.is_file(follow_symlinks=False):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+
+
+scratch_dirs = _ScratchDirs()
+atexit.register(scratch_dirs.close)
+
+
+def _static_stamp(directory: str) -> tuple[int, ...]:
+    """Fingerprint the files of a static route so edits invalidate the cache."""
+    stamp: list[int] = []
+    for name in STATIC_FILES:
+        st = os.stat(os.path.join(directory, name))
+        stamp += (st.st_mtime_ns, st.st_size)
+    return tuple(stamp)
+
+
+def _parse_headers(raw: bytes) -> dict[str, str]:
+    """Parse a HEADERS file, silently skipping lines without a colon."""
+    return {
+        key.strip().decode(): value.strip().decode()
+        for key, sep, value in (line.partition(b":") for line in raw.splitlines())
+        if sep
+    }
+
+
+def _serialise_headers(headers: dict[str, str]) -> tuple[bytes, str | None]:
+    """Encode route headers for the wire, minus framing and Connection.
+
+    Returns the header block and the route's Connection header, if any.
+    """
+    connection = None
+    lines = []
+    for key, value in headers.items():
+        name = key.lower()
+        if name == "connection":
+            connection = value
+        elif name not in FRAMING_HEADERS:
+            lines.append(f"{key}: {value}\r\n")
+    return "".join(lines).encode("latin-1", "strict"), connection
+
+
+class _PreparedHeaders(dict[str, str]):
+    """Route headers that carry their wire form, serialised once on load."""
+
+    def __init__(self, headers: dict[str, str]) -> None:
+        super().__init__(headers)
+        self.wire, self.connection = _serialise_headers(headers)
+
+
+class FileBody:
+    """A response body left on disk, to be copied to the socket by the kernel."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def read(self) -> bytes:
+        return _slurp(self.path)
+
+
+def _read_route(
+    directory: str, large_on_disk: bool = True
+) -> tuple[int, bytes | FileBody, _PreparedHeaders]:
+    status_code = int(_slurp(os.path.join(directory, "STATUS")))
+
+    data_path = os.path.join(directory, "DATA")
+    response_data: bytes | FileBody
+    if large_on_disk and os.path.getsize(data_path) > SENDFILE_THRESHOLD:
+        response_data = FileBody(data_path)
+    else:
+        response_data = _slurp(data_path)
+    response_headers = _PreparedHeaders(
+        _parse_headers(_slurp(os.path.join(directory, "HEADERS")))
+    )
+    return status_code, response_data, response_headers
+
+
+@lru_cache(maxsize=1024)
+def _load_static(
+    directory: str, stamp: tuple[int, ...]
+) -> tuple[int, bytes | FileBody, _PreparedHeaders]:
+    return _read_route(directory)
+
+
+class _RouteTree:
+    """The directories under root_dir, held in memory for __TEMPLATE__ lookups.
+
+    Built with one walk of the tree, so resolving a path costs no syscalls. A miss
+    re-stats only the directories it passed through, and rebuilds the tree if
+    any of them changed; reload() rebuilds it unconditionally.
+    """
+
+    def __init__(self, root_dir: str | Path) -> None:
+        self.root_dir = os.path.abspath(root_dir)
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self) -> None:
+        """Walk root_dir again and swap in the new tree."""
+        tree: dict = {}
+        stamps = {}
+        # Each directory carries the (st_dev, st_ino) of its ancestors, so
+        # symlinks are followed without walking round a cycle forever.
+        pending: list[tuple[str, dict, frozenset]] = [
+            (self.root_dir, tree, frozenset())
+        ]
+        while pending:
+            path, node, ancestors = pending.pop()
+            try:
+                # Stamped before listing, so a later change can't go unnoticed.
+                st = os.stat(path)
+            except OSError:
+                continue
+            stamps[path] = st.st_mtime_ns
+            identity = (st.st_dev, st.st_ino)
+            if identity in ancestors:
+                continue
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_dir():
+                            child = node[entry.name] = {}
+                            pending.append((entry.path, child, ancestors | {identity}))
+            except OSError:
+                continue
+        with self._lock:
+            self._index = tree, stamps
+
+    def find(self, directory: str) -> str | None:
+        """Return the directory serving directory, preferring literal names."""
+        directory = os.path.abspath(directory)
+        if not directory.startswith(self.root_dir + os.sep):
+            return None
+        parts = directory[len(self.root_dir) + 1 :].split(os.sep)
+
+        for _ in range(2):
+            tree, stamps = self._index
+            found = self._search(tree, parts, 0)
+            if found is not None:
+                candidate = os.path.join(self.root_dir, *found)
+                if os.path.isdir(candidate):
+                    return candidate
+            elif not self._stale(tree, stamps, parts):
+                return None
+            self.reload()
+        return None
+
+    def _search(self, node: dict, parts: list[str], i: int) -> list[str] | None:
+        if i == len(parts):
+            return []
+        for name in (parts[i], "__TEMPLATE__"):
+            child = node.get(name)
+            if child is not None:
+                rest = self._search(child, parts, i + 1)
+                if rest is not None:
+                    return [name, *rest]
+        return None
+
+    def _stale(self, tree: dict, stamps: dict[str, int], parts: list[str]) -> bool:
+        """Whether a directory the search passed through has changed on disk."""
+        pending = [(tree, self.root_dir, 0)]
+        while pending:
+            node, path, i = pending.pop()
+            if path not in stamps:
+                # It couldn't be stat'ed during the walk; nothing to compare.
+                continue
+            try:
+                if os.stat(path).st_mtime_ns != stamps[path]:
+                    return True
+            except OSError:
+                return True
+            if i < len(parts):
+                for name in {parts[i], "__TEMPLATE__"}:
+                    if name in node:
+                        pending.append((node[name], os.path.join(path, name), i + 1))
+        return False
+
+
+_route_trees: dict[str, _RouteTree] = {}
+_route_trees_lock = threading.Lock()
+
+
+def route_tree(root_dir: str | Path) -> _RouteTree:
+    """Return the route tree for root_dir, walking it on first use."""
+    key = os.fspath(root_dir)
+    tree = _route_trees.get(key)
+    if tree is None:
+        with _route_trees_lock:
+            tree = _route_trees.get(key)
+            if tree is None:
+                tree = _route_trees[key] = _RouteTree(key)
+    return tree
+
+
+def reload_routes() -> None:
+    """Rebuild every route tree, e.g. after the mock tree was edited."""
+    for tree in list(_route_trees.values()):
+        tree.reload()
+
+
+def find_directory(root_dir: str, directory: str) -> str | None:
+    """Return directory, or the __TEMPLATE__ directory standing in for it."""
+    if os.path.isdir(directory):
+        return directory
+    return route_tree(root_dir).find(directory)
+
+
+def is_within(path: str, directory: str) -> bool:
+    """Whether path is directory itself or somewhere below it."""
+    if not directory:
+        return False
+    path, directory = os.path.abspath(path), os.path.abspath(directory)
+    return path == directory or path.startswith(directory + os.sep)
+
+
+def read_static(
+    directory: str, cache: bool = True
+) -> tuple[int, bytes | FileBody, dict[str, str]]:
+    """Load the static response in directory.
+
+    Pass cache=False for a folder that only lives as long as one request, such
+    as one a HANDLE script built in its scratch directory. Scratch directories
+    are reused, so their contents can't be told apart by path and timestamps;
+    the folder is read afresh and whole.
+    """
+    if not cache:
+        return _read_route(directory, large_on_disk=False)
+    return _load_static(directory, _static_stamp(directory))
+
 
 class ChoraHTTPRequestHandler(BaseHTTPRequestHandler):
     """HTTP request handler that serves responses based on file system structure."""
 
+    protocol_version = "HTTP/1.1"
+    # Responses go out in one write, so there is nothing for Nagle to merge.
+    disable_nagle_algorithm = True
+    # Idle keep-alive connections are dropped so they don't hold a worker.
+    timeout = 10
+
     def __init__(
         self,
         *args,
@@ -22,110 +346,142 @@ class ChoraHTTPRequestHandler(BaseHTTPRequestHandler):
         tmpdir: str | Path = "/tmp/chora_cache",
         **kwargs,
     ):
-        self.root_dir = Path(root_dir)
-        self.tmpdir = Path(tmpdir)
+        # Plain strings keep Path construction off the per-request path.
+        self.root_dir = os.fspath(root_dir)
+        self.tmpdir = os.fspath(tmpdir)
         super().__init__(*args, **kwargs)
 
+    def _dispatch(self) -> None:
+        self._handle_request(self.command)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+    do_PATCH = do_HEAD = do_OPTIONS = _dispatch
+
     def __getattr__(self, item: str) -> Callable:
+        # Less common methods (PROPFIND, PURGE, ...) are still routed.
         if item.startswith("do_"):
             return partial(self._handle_request, item[3:])
         raise AttributeError(f"Method {item} not supported.")
 
-    def _get_directory(self, directory: Path) -> Path | None:
-        if directory.is_dir():
-            return directory
-
-        parts = list(directory.parts)
-        for i in range(len(parts), 0, -1):
-            candidate = Path(*parts[: i - 1], "__TEMPLATE__", *parts[i:])
-            if candidate.exists() and candidate.is_dir():
-                return candidate
-        return None
+    def _get_directory(self, directory: str) -> str | None:
+        return find_directory(self.root_dir, directory)
 
     def get_handler(
-        self, directory: Path
-    ) -> Callable[[], tuple[int, bytes, dict[str, str]]]:
-        """Get the handler for the request based on the directory structure."""
-        directory = self._get_directory(directory)  # type: ignore[assignment]
-        if not directory:
+        self, directory: str, depth: int = 0
+    ) -> Callable[[], tuple[int, bytes | FileBody, dict[str, str]]]:
+        """Get the handler for the request based on the directory structure.
+
+        depth counts the HANDLE scripts the request has already passed through.
+        """
+        found = self._get_directory(directory)
+        if not found:
             raise FileNotFoundError(f"Directory not found: {directory}")
 
-        if (directory / "HANDLE").exists():
-            return self._dynamic_handler(directory)
+        if os.path.exists(os.path.join(found, "HANDLE")):
+            return self._dynamic_handler(found, depth)
 
-        return partial(self._static_handler, directory)
+        return partial(self._static_handler, found)
 
     def _dynamic_handler(
-        self, directory: Path
-    ) -> Callable[[], tuple[int, bytes, dict[str, str]]]:
-        handler = (directory / "HANDLE").absolute()
-
-        if not os.access(handler, os.X_OK):
-            raise PermissionError(f"HANDLE script is not executable: {handler}")
-
-        proc = subprocess.run(
-            [str(handler.absolute()), str(self.tmpdir)],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        output = proc.stdout.strip()
-        response_dir = Path(output)
-        if not response_dir.is_absolute():
-            response_dir = handler.parent / response_dir
-
-        print(f"Dynamic handler output: {response_dir}")
-        return self.get_handler(response_dir)
-
-    def _static_handler(self, directory: Path) -> tuple[int, bytes, dict[str, str]]:
-        status_file = directory / "STATUS"
-        status_code = int(status_file.read_text().strip())
-
-        data_file = directory / "DATA"
-        response_data = data_file.read_bytes()
-        response_headers = {}
-
-        headers_file = directory / "HEADERS"
-        headers_content = headers_file.read_text().strip()
-        for line in headers_content.split("\n"):
-            if ":" in line:
-                key, value = line.split(":", 1)
-                response_headers[key.strip()] = value.strip()
-        return status_code, response_data, response_headers
-
-    def _cache_request(self) -> None:
-        (self.tmpdir / "REQUEST").write_text(str(self.requestline))
-
-        with open(self.tmpdir / "HEADERS", "w") as f:
-            for k, v in self.headers.items():
-                f.write(f"{k}: {v}\n")
-
-        # Read request body if present
-        content_length = int(self.headers.get("Content-Length", 0))
-        body = self.rfile.read(content_length).decode()
-        (self.tmpdir / "DATA").write_text(str(body))
+        self, directory: str, depth: int = 0
+    ) -> Callable[[], tuple[int, bytes | FileBody, dict[str, str]]]:
+        if depth >= MAX_HANDLE_CHAIN:
+            raise ValueError(
+                f"More than {MAX_HANDLE_CHAIN} chained HANDLE scripts at {directory}"
+            )
+        response_dir = resolve_handle(directory, self.tmpdir, self.request_digest)
+        return self.get_handler(response_dir, depth + 1)
+
+    def _static_handler(
+        self, directory: str
+    ) -> tuple[int, bytes | FileBody, dict[str, str]]:
+        return read_static(directory, cache=not is_within(directory, self.tmpdir))
+
+    def _cache_request(self, body: bytes) -> None:
+        requestline = str(self.requestline).encode()
+        _spit(os.path.join(self.tmpdir, "REQUEST"), requestline)
+
+        # Header values were decoded as latin-1, so encode them the same way;
+        # UTF-8 here would double-encode any non-ASCII bytes.
+        headers = "".join(f"{k}: {v}\n" for k, v in self.headers.items())
+        headers_bytes = headers.encode("latin-1")
+        _spit(os.path.join(self.tmpdir, "HEADERS"), headers_bytes)
+
+        _spit(os.path.join(self.tmpdir, "DATA"), body)
+        self.request_digest = request_digest(requestline, headers_bytes, body)
+
+    def _read_body(self) -> bytes:
+        """Read the request body, if present, off the connection.
+
+        Chunked bodies are decoded. A body that can't be delimited raises
+        ValueError, and the connection is closed rather than reused.
+        """
+        try:
+            transfer_encoding = self.headers.get("Transfer-Encoding")
+            if transfer_encoding is not None:
+                if transfer_encoding.strip().lower() != "chunked":
+                    raise ValueError(
+                        f"Unsupported Transfer-Encoding: {transfer_encoding}"
+                    )
+                return self._read_chunked_body()
+
+            content_length = int(self.headers.get("Content-Length", 0))
+            if content_length < 0:
+                raise ValueError(f"Invalid Content-Length: {content_length}")
+        except ValueError:
+            self.close_connection = True
+            raise
+        return self.rfile.read(content_length)
+
+    def _read_chunked_body(self) -> bytes:
+        chunks = []
+        while True:
+            size_line = self.rfile.readline(65537)
+            size = int(size_line.split(b";", 1)[0].strip(), 16)
+            if size < 0:
+                raise ValueError(f"Invalid chunk size: {size}")
+            if size == 0:
+                break
+            chunk = self.rfile.read(size)
+            if len(chunk) < size or self.rfile.readline(3) != b"\r\n":
+                raise ValueError("Truncated chunked request body")
+            chunks.append(chunk)
+        # Trailer fields, if any, end with an empty line.
+        while self.rfile.readline(65537) not in (b"\r\n", b"\n", b""):
+            pass
+        return b"".join(chunks)
 
     def _handle_request(self, method: str) -> None:
         """Handle HTTP request by looking up response in file system."""
         try:
-            parsed_url = urlparse(self.path)
-            path = parsed_url.path.strip("/")
-
-            method_dir = self.root_dir / path / method
-
-            with tempfile.TemporaryDirectory() as tmpdir:
-                self.tmpdir = Path(tmpdir)
-                self._cache_request()
-                handler = self.get_handler(method_dir)
-                status_code, data, headers = handler()
-
-                self.send_response(status_code)
-
-                for key, value in headers.items():
-                    self.send_header(key, value)
-                self.end_headers()
-
-                self.wfile.write(data)
+            # The body is read before taking a slot, so a slow upload doesn't
+            # keep other clients waiting.
+            body = self._read_body()
+
+            # A slot is held per request, not per connection, so idle keep-alive
+            # connections never keep other clients waiting either.
+            with getattr(self.server, "request_slots", nullcontext()):
+                parsed_url = urlparse(self.path)
+                path = parsed_url.path.strip("/")
+
+                method_dir = self._get_directory(
+                    os.path.join(self.root_dir, path, method)
+                )
+                if not method_dir:
+                    raise FileNotFoundError(f"Directory not found: {path}/{method}")
+
+                # Only HANDLE scripts look at the request, so static routes skip
+                # writing it out to a temporary directory.
+                if os.path.exists(os.path.join(method_dir, "HANDLE")):
+                    with scratch_dirs.checkout() as tmpdir:
+                        self.tmpdir = tmpdir
+                        self._cache_request(body)
+                        handler = self.get_handler(method_dir)
+                        status_code, data, headers = handler()
+                else:
+                    status_code, data, headers = self._static_handler(method_dir)
+
+                self._send_response(status_code, data, headers)
 
             print(f"{method} {self.path} -> {status_code}")
 
@@ -135,21 +491,84 @@ class ChoraHTTPRequestHandler(BaseHTTPRequestHandler):
         except PermissionError:
             self._send_error_response(403, "Forbidden")
 
+        except subprocess.TimeoutExpired:
+            self._send_error_response(504, "Gateway Timeout")
+
         except (ValueError, subprocess.CalledProcessError) as e:
             self._send_error_response(500, f"Internal Server Error: {str(e)}")
 
+    def _send_response(
+        self, status_code: int, data: bytes | FileBody, headers: dict[str, str]
+    ) -> None:
+        """Send the status line, headers and body with a single write.
+
+        Content-Length is set from the body, replacing any framing headers from
+        the route, so the connection can be kept alive; statuses that can't have
+        a body get neither. A body left on disk follows the headers with
+        sendfile.
+        """
+        has_body = response_has_body(status_code)
+        if not has_body:
+            data = b""
+        # The file is opened by the with, so no exception before the send can
+        # leak its descriptor.
+        with ExitStack() as stack:
+            body_file = None
+            if isinstance(data, FileBody):
+                body_file = stack.enter_context(open(data.path, "rb"))
+                length = os.fstat(body_file.fileno()).st_size
+                data = b""
+            else:
+                length = len(data)
+
+            self.log_request(status_code)
+            if isinstance(headers, _PreparedHeaders):
+                route_headers, connection = headers.wire, headers.connection
+            else:
+                route_headers, connection = _serialise_headers(headers)
+
+            if connection is None:
+                connection = "close" if self.close_connection else "keep-alive"
+            elif connection.lower() == "close":
+                self.close_connection = True
+
+            phrase = self.responses.get(status_code, ("",))[0]
+            preamble = (
+                f"{self.protocol_version} {status_code} {phrase}\r\n"
+                f"Server: {self.version_string()}\r\n"
+                f"Date: {self.date_time_string()}\r\n"
+            )
+            trailer = f"Connection: {connection}\r\n"
+            if has_body:
+                trailer += f"Content-Length: {length}\r\n"
+            trailer += "\r\n"
+
+            if self.command == "HEAD":
+                data = b""
+            self.wfile.write(
+                preamble.encode("latin-1")
+                + route_headers
+                + trailer.encode("latin-1", "strict")
+                + data
+            )
+            if body_file and self.command != "HEAD":
+                # Falls back to plain sends where os.sendfile is unavailable.
+                self.connection.sendfile(body_file, 0, length)
+
     def _send_error_response(self, status_code: int, message: str) -> None:
         """Send a simple error response."""
-        self.send_response(status_code)
-        self.send_header("Content-Type", "text/plain")
-        self.end_headers()
-        self.wfile.write(message.encode())
+        self._send_response(
+            status_code, message.encode(), {"Content-Type": "text/plain"}
+        )
         print(f"ERROR {self.path} -> {status_code}: {message}")
 
 
 def create_handler(
     root_dir: str | Path, tmpdir: str | Path = ""
 ) -> Callable[..., ChoraHTTPRequestHandler]:
+    # Walk the tree now rather than on the first request.
+    route_tree(root_dir)
+
     def handler(*args, **kwargs) -> ChoraHTTPRequestHandler:
         return ChoraHTTPRequestHandler(
             root_dir=root_dir, tmpdir=tmpdir, *args, **kwargs
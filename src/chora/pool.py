@@ -0,0 +1,166 @@
+"""
+Long-lived HANDLE script processes for chora server.
+
+A HANDLE script opts in by placing a HANDLE.persistent file next to it. It is
+then started once, without arguments, and reads one request directory per line
+on stdin, answering each with the response directory on a line of stdout.
+"""
+
+import atexit
+import os
+import select
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+PERSISTENT_MARKER = "HANDLE.persistent"
+
+
+class _Worker:
+    """A single running HANDLE process, serving one request at a time."""
+
+    def __init__(self, handler: str | Path, stamp: int) -> None:
+        self.stamp = stamp
+        self.lock = threading.Lock()
+        self.proc = subprocess.Popen(
+            [str(handler)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=0,
+        )
+        self._pending = b""
+
+    def ask(self, tmpdir: str | Path, timeout: float) -> str | None:
+        """Send a request to the process; None if it went away before answering.
+
+        Raises TimeoutExpired if no answer arrives within timeout seconds.
+        """
+        assert self.proc.stdin
+        with self.lock:
+            try:
+                self.proc.stdin.write(f"{tmpdir}\n".encode())
+                return self._readline(timeout)
+            except (OSError, ValueError):
+                return None
+
+    def _readline(self, timeout: float) -> str | None:
+        assert self.proc.stdout
+        fd = self.proc.stdout.fileno()
+        deadline = time.monotonic() + timeout
+        while b"\n" not in self._pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+                raise subprocess.TimeoutExpired(self.proc.args, timeout)
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                return None
+            self._pending += chunk
+        line, _, self._pending = self._pending.partition(b"\n")
+        return line.decode() + "\n"
+
+    def close(self) -> None:
+        try:
+            if self.proc.stdin:
+                self.proc.stdin.close()
+        except OSError:
+            pass
+        if self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        if self.proc.stdout:
+            self.proc.stdout.close()
+
+
+class HandlerProcessPool:
+    """Keeps one process per HANDLE script, evicting the least recently used.
+
+    A script that takes longer than timeout seconds to answer is killed.
+    """
+
+    def __init__(self, maxsize: int = 32, timeout: float = 30.0) -> None:
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._workers: OrderedDict[str, _Worker] = OrderedDict()
+
+    def run(self, handler: str | Path, tmpdir: str | Path) -> str:
+        """Ask the HANDLE script at handler to answer the request in tmpdir.
+
+        A process that has exited, or that was edited on disk, is restarted.
+        Raises CalledProcessError if a fresh process also fails to answer, and
+        TimeoutExpired if the script doesn't answer in time.
+        """
+        for _ in range(2):
+            worker = self._checkout(handler)
+            try:
+                output = worker.ask(tmpdir, self.timeout)
+            except subprocess.TimeoutExpired:
+                self._discard(str(handler), worker)
+                raise
+            if output is not None:
+                return output
+            self._discard(str(handler), worker)
+        raise subprocess.CalledProcessError(worker.proc.returncode, [str(handler)])
+
+    def close(self) -> None:
+        """Stop every pooled process."""
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.close()
+
+    def __len__(self) -> int:
+        return len(self._workers)
+
+    def _checkout(self, handler: str | Path) -> _Worker:
+        key = str(handler)
+        stamp = os.stat(handler).st_mtime_ns
+        stale: list[_Worker] = []
+        with self._lock:
+            worker = self._live(key, stamp, stale)
+
+        if worker is None:
+            # Started outside the lock, so a slow exec only holds up its own
+            # script. If another request started one meanwhile, use theirs.
+            fresh = _Worker(handler, stamp)
+            with self._lock:
+                worker = self._live(key, stamp, stale)
+                if worker is None:
+                    worker = self._workers[key] = fresh
+                else:
+                    stale.append(fresh)
+                while len(self._workers) > self.maxsize:
+                    stale.append(self._workers.popitem(last=False)[1])
+
+        for old in stale:
+            old.close()
+        return worker
+
+    def _live(self, key: str, stamp: int, stale: list[_Worker]) -> _Worker | None:
+        """Return the usable pooled worker for key, retiring a stale one."""
+        worker = self._workers.get(key)
+        if worker is None:
+            return None
+        if worker.stamp != stamp or worker.proc.poll() is not None:
+            stale.append(self._workers.pop(key))
+            return None
+        self._workers.move_to_end(key)
+        return worker
+
+    def _discard(self, key: str, worker: _Worker) -> None:
+        with self._lock:
+            if self._workers.get(key) is worker:
+                del self._workers[key]
+        worker.close()
+
+
+handler_pool = HandlerProcessPool()
+atexit.register(handler_pool.close)
@@ -4,14 +4,55 @@ chora server implementation.
 """
 
 import atexit
+import importlib.util
+import signal
+import socket
+import threading
 from functools import partial
-from http.server import HTTPServer
+from http.server import ThreadingHTTPServer
 from pathlib import Path
 
-from .handler import create_handler
+from .asgi import start_asgi_server
+from .handler import create_handler, reload_routes
 
+DEFAULT_THREADS = 16
 
-def cleanup(server: HTTPServer) -> None:
+
+class ChoraHTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server that caps the number of requests in flight.
+
+    Each connection gets its own thread, but at most n_threads of them are
+    handling a request at any time; the rest wait for a free request slot.
+    """
+
+    daemon_threads = True
+    # The kernel clamps this to net.core.somaxconn.
+    request_queue_size = 4096
+
+    def __init__(
+        self,
+        *args,
+        n_threads: int = DEFAULT_THREADS,
+        reuse_port: bool = False,
+        **kwargs,
+    ):
+        if n_threads < 1:
+            raise ValueError(f"n_threads must be at least 1, got {n_threads}")
+        # Taken by the handler around each request; see _handle_request.
+        self.request_slots = threading.BoundedSemaphore(n_threads)
+        self.reuse_port = reuse_port
+        super().__init__(*args, **kwargs)
+
+    def server_bind(self) -> None:
+        # Lets several chora processes share a port, balanced by the kernel.
+        if self.reuse_port:
+            if not hasattr(socket, "SO_REUSEPORT"):
+                raise OSError("SO_REUSEPORT is not supported on this platform")
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+
+def cleanup(server: ChoraHTTPServer) -> None:
     print("\nShutting down server...")
     try:
         server.shutdown()
@@ -24,16 +65,54 @@ def cleanup(server: HTTPServer) -> None:
         print(f"Warning: Error during server close: {e}")
 
 
-def start_server(root_path: Path, host: str, port: int) -> None:
+def _reload_on_hangup(signum: int, frame: object) -> None:
+    print("Reloading routes")
+    reload_routes()
+
+
+def start_server(
+    root_path: Path,
+    host: str,
+    port: int,
+    n_threads: int = DEFAULT_THREADS,
+    asgi: bool = False,
+    reuse_port: bool = False,
+) -> None:
     """Start the HTTP server with the given configuration.
 
     Args:
         root_path: Path to the root directory for mock responses
         host: Host to bind the server to
         port: Port to run the server on
+        n_threads: Maximum number of requests handled concurrently
+        asgi: Serve with uvicorn on an event loop instead, if it is installed
+        reuse_port: Set SO_REUSEPORT so other processes can share the port
     """
+    # Signal handlers can only be installed from the main thread.
+    if (
+        hasattr(signal, "SIGHUP")
+        and threading.current_thread() is threading.main_thread()
+    ):
+        signal.signal(signal.SIGHUP, _reload_on_hangup)
+
+    if asgi:
+        if importlib.util.find_spec("uvicorn") is not None:
+            if n_threads != DEFAULT_THREADS or reuse_port:
+                print(
+                    "Warning: --threads and --reuse-port only apply to the "
+                    "threaded server, ignoring them."
+                )
+            start_asgi_server(root_path, host, port)
+            return
+        print(
+            "Warning: uvicorn is not installed, using the threaded server "
+            f"with {n_threads} worker threads."
+        )
+
     handler = create_handler(root_path)
-    server = HTTPServer((host, port), handler)
+    server = ChoraHTTPServer(
+        (host, port), handler, n_threads=n_threads, reuse_port=reuse_port
+    )
 
     atexit.register(partial(cleanup, server))
 
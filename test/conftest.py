@@ -1,16 +1,16 @@
+import http.client
 import json
 import socket
 import threading
 import time
-from http.server import HTTPServer
 from pathlib import Path
 from typing import Any, Dict, Generator, Tuple
-from urllib.error import HTTPError
-from urllib.request import urlopen
+from urllib.parse import urlsplit
 
 import pytest
 
 from chora.handler import create_handler
+from chora.server import ChoraHTTPServer
 
 
 @pytest.fixture
@@ -27,31 +27,43 @@ class TestClient:
     def __init__(self, base_url: str, tmp_path: Path) -> None:
         self.base_url = base_url
         self.tmp_path = tmp_path
+        # One keep-alive connection is reused for every request.
+        self._conn = http.client.HTTPConnection(urlsplit(base_url).netloc)
+
+    def close(self) -> None:
+        """Close the connection to the server."""
+        self._conn.close()
 
     def get(self, path: str) -> "TestResponse":
         """Make a GET request to the server."""
-        return self._request("GET", path)
+        return self.request("GET", path)
 
-    def _request(self, method: str, path: str, data: Any = None) -> "TestResponse":
-        """Make an HTTP request and return a response object."""
-        url = f"{self.base_url}{path}"
+    def post(self, path: str, body: bytes | None = None) -> "TestResponse":
+        """Make a POST request to the server."""
+        return self.request("POST", path, body)
 
+    def request(
+        self, method: str, path: str, body: bytes | None = None
+    ) -> "TestResponse":
+        """Make an HTTP request and return a response object."""
         try:
-            response = urlopen(url)
-            return TestResponse(response)
-        except HTTPError as e:
-            return TestResponse(e)
+            self._conn.request(method, path, body=body)
+            response = self._conn.getresponse()
+        except (http.client.RemoteDisconnected, ConnectionResetError):
+            # The server dropped the idle connection, so reconnect once.
+            self._conn.close()
+            self._conn.request(method, path, body=body)
+            response = self._conn.getresponse()
+        return TestResponse(response)
 
 
 class TestResponse:
     """Wrapper for HTTP responses in tests."""
 
-    def __init__(self, response: Any) -> None:
+    def __init__(self, response: http.client.HTTPResponse) -> None:
         self._response = response
-        self.status_code = (
-            response.status if hasattr(response, "status") else response.code
-        )
-        self.headers = dict(response.headers) if hasattr(response, "headers") else {}
+        self.status_code = response.status
+        self.headers = dict(response.headers)
 
         self.data = response.read()
 
@@ -72,10 +84,10 @@ class TestResponse:
 @pytest.fixture
 def test_server(
     tmp_path: Path, port: int
-) -> Generator[Tuple[HTTPServer, Path, int], None, None]:
+) -> Generator[Tuple[ChoraHTTPServer, Path, int], None, None]:
     """Fixture that provides a running test server."""
     handler = create_handler(tmp_path)
-    server = HTTPServer(("127.0.0.1", port), handler)
+    server = ChoraHTTPServer(("127.0.0.1", port), handler)
 
     # Start server in a separate thread
     server_thread = threading.Thread(target=server.serve_forever, daemon=True)
@@ -92,11 +104,15 @@ def test_server(
 
 
 @pytest.fixture
-def test_client(test_server: Tuple[HTTPServer, Path, int]) -> TestClient:
+def test_client(
+    test_server: Tuple[ChoraHTTPServer, Path, int],
+) -> Generator[TestClient, None, None]:
     """Fixture that provides a test client for making HTTP requests."""
     _, tmp_path, port = test_server
     base_url = f"http://127.0.0.1:{port}"
-    return TestClient(base_url, tmp_path)
+    client = TestClient(base_url, tmp_path)
+    yield client
+    client.close()
 
 
 def make_static_route(
@@ -0,0 +1,216 @@
+"""
+Tests for the chora ASGI application.
+"""
+
+import asyncio
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+from conftest import make_static_route
+
+from chora.asgi import ChoraASGIApp
+from chora.handler import SENDFILE_THRESHOLD
+
+
+def call_app(
+    root: Path,
+    method: str,
+    path: str,
+    body: bytes = b"",
+    query: bytes = b"",
+    raw_path: bytes | None = None,
+) -> tuple[int, dict[str, str], bytes]:
+    """Drive the app through one HTTP request and collect the response."""
+    scope = {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "path": path,
+        "raw_path": raw_path,
+        "query_string": query,
+        "headers": [(b"host", b"testserver")],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent: list[dict[str, Any]] = []
+
+    async def receive() -> dict[str, Any]:
+        return messages.pop(0)
+
+    async def send(message: dict[str, Any]) -> None:
+        sent.append(message)
+
+    asyncio.run(ChoraASGIApp(root)(scope, receive, send))
+
+    start, response_body = sent
+    headers = {k.decode(): v.decode() for k, v in start["headers"]}
+    return start["status"], headers, response_body["body"]
+
+
+def test_static_route(tmp_path: Path) -> None:
+    """Test that static routes are served."""
+    make_static_route(
+        tmp_path / "test" / "GET",
+        headers={"Content-Type": "application/json", "Content-Length": "1"},
+        body={"key": "value"},
+    )
+
+    status, headers, body = call_app(tmp_path, "GET", "/test")
+
+    assert status == 200
+    assert headers["content-type"] == "application/json"
+    assert headers["content-length"] == str(len(body))
+    assert json.loads(body) == {"key": "value"}
+
+
+def test_head_has_no_body(tmp_path: Path) -> None:
+    """Test that HEAD responses keep Content-Length but drop the body."""
+    make_static_route(tmp_path / "test" / "HEAD", body="hidden")
+
+    status, headers, body = call_app(tmp_path, "HEAD", "/test")
+
+    assert status == 200
+    assert headers["content-length"] == str(len(b'"hidden"'))
+    assert body == b""
+
+
+def test_no_content_has_no_body(tmp_path: Path) -> None:
+    """Test that a 204 response carries neither a body nor Content-Length."""
+    make_static_route(tmp_path / "test" / "GET", status_code=204, body={})
+
+    status, headers, body = call_app(tmp_path, "GET", "/test")
+
+    assert status == 204
+    assert "content-length" not in headers
+    assert body == b""
+
+
+def test_routes_on_raw_path(tmp_path: Path) -> None:
+    """Test that percent-encoded paths map to the same directory as threaded."""
+    make_static_route(tmp_path / "a%20b" / "GET", body="encoded")
+
+    status, _, body = call_app(tmp_path, "GET", "/a b", raw_path=b"/a%20b")
+
+    assert status == 200
+    assert json.loads(body) == "encoded"
+
+
+def test_template_route(tmp_path: Path) -> None:
+    """Test that __TEMPLATE__ directories are used for unknown path segments."""
+    make_static_route(tmp_path / "users" / "__TEMPLATE__" / "GET", body="templated")
+
+    status, _, body = call_app(tmp_path, "GET", "/users/42")
+
+    assert status == 200
+    assert json.loads(body) == "templated"
+
+
+def test_dynamic_route(tmp_path: Path) -> None:
+    """Test that HANDLE scripts see the request and pick the response."""
+    handler_dir = tmp_path / "dynamic" / "POST"
+    handler_dir.mkdir(parents=True)
+    handle_script = handler_dir / "HANDLE"
+    handle_script.write_text("""#!/bin/sh
+if grep "flag=on" "$1/REQUEST" >/dev/null && grep "payload" "$1/DATA" >/dev/null; then
+    echo "yes"
+else
+    echo "no"
+fi
+""")
+    handle_script.chmod(0o755)
+    make_static_route(handler_dir / "yes", body="yes")
+    make_static_route(handler_dir / "no", body="no")
+
+    _, _, body = call_app(tmp_path, "POST", "/dynamic", b"payload", b"flag=on")
+    assert json.loads(body) == "yes"
+
+    _, _, body = call_app(tmp_path, "POST", "/dynamic", b"payload")
+    assert json.loads(body) == "no"
+
+
+def test_response_built_in_request_directory(tmp_path: Path) -> None:
+    """Test that responses a script writes under $1 are read fresh, before cleanup."""
+    handler_dir = tmp_path / "echo" / "POST"
+    handler_dir.mkdir(parents=True)
+    handle_script = handler_dir / "HANDLE"
+    handle_script.write_text("""#!/bin/sh
+mkdir "$1/resp"
+echo 200 > "$1/resp/STATUS"
+: > "$1/resp/HEADERS"
+cp "$1/DATA" "$1/resp/DATA"
+touch -t 200001010000 "$1/resp/STATUS" "$1/resp/HEADERS" "$1/resp/DATA"
+echo "$1/resp"
+""")
+    handle_script.chmod(0o755)
+
+    # Scratch directories are reused, so only the contents differ.
+    for payload in (b"0000", b"0004"):
+        status, _, body = call_app(tmp_path, "POST", "/echo", payload)
+        assert status == 200
+        assert body == payload
+
+
+@pytest.mark.parametrize(
+    "mode,script,expected",
+    [
+        (0o644, 'echo "x"\n', 403),
+        (0o755, "exit 1\n", 500),
+        (0o755, 'echo "/does/not/exist"\n', 404),
+        (0o755, 'echo "."\n', 500),
+    ],
+)
+def test_dynamic_route_errors(
+    tmp_path: Path, mode: int, script: str, expected: int
+) -> None:
+    """Test that HANDLE script failures map onto the same errors as the handler."""
+    handler_dir = tmp_path / "broken" / "GET"
+    handler_dir.mkdir(parents=True)
+    handle_script = handler_dir / "HANDLE"
+    handle_script.write_text(f"#!/bin/sh\n{script}")
+    handle_script.chmod(mode)
+
+    status, headers, _ = call_app(tmp_path, "GET", "/broken")
+
+    assert status == expected
+    assert headers["content-type"] == "text/plain"
+
+
+def test_not_found(tmp_path: Path) -> None:
+    """Test that unknown routes return 404."""
+    status, _, body = call_app(tmp_path, "GET", "/nowhere")
+
+    assert status == 404
+    assert body == b"Not Found"
+
+
+def test_lifespan(tmp_path: Path) -> None:
+    """Test that lifespan startup and shutdown are acknowledged."""
+    messages = [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+    sent: list[dict[str, Any]] = []
+
+    async def receive() -> dict[str, Any]:
+        return messages.pop(0)
+
+    async def send(message: dict[str, Any]) -> None:
+        sent.append(message)
+
+    asyncio.run(ChoraASGIApp(tmp_path)({"type": "lifespan"}, receive, send))
+
+    assert [m["type"] for m in sent] == [
+        "lifespan.startup.complete",
+        "lifespan.shutdown.complete",
+    ]
+
+
+def test_large_data(tmp_path: Path) -> None:
+    """Test that DATA files too large to keep in memory are still served."""
+    payload = b"z" * (SENDFILE_THRESHOLD + 1)
+    make_static_route(tmp_path / "big" / "GET")
+    (tmp_path / "big" / "GET" / "DATA").write_bytes(payload)
+
+    status, headers, body = call_app(tmp_path, "GET", "/big")
+
+    assert status == 200
+    assert headers["content-length"] == str(len(payload))
+    assert body == payload
@@ -5,6 +5,7 @@ from unittest.mock import patch
 import pytest
 
 from chora.cli import load_config_from_file, parse_arguments
+from chora.server import DEFAULT_THREADS
 
 
 @pytest.fixture
@@ -128,6 +129,29 @@ class TestParseArguments:
             assert args.root == "./chora-root"
             assert args.port == 8000
             assert args.host == "localhost"
+            assert args.threads == DEFAULT_THREADS
+            assert args.asgi is False
+            assert args.reuse_port is False
+
+    @pytest.mark.parametrize("threads", ["0", "-4", "many"])
+    def test_threads_must_be_positive(
+        self, remove_existing_config: None, threads: str
+    ) -> None:
+        """Test that a --threads value below one is rejected by the parser."""
+        with patch("sys.argv", ["chora", "--threads", threads]):
+            with pytest.raises(SystemExit):
+                parse_arguments()
+
+    def test_threads_from_config_must_be_positive(self, tmp_path: Path) -> None:
+        """Test that pyproject.toml can't set threads below one either."""
+        config_file = tmp_path / "pyproject.toml"
+        config_file.write_text("[tool.chora]\nthreads = 0\n")
+
+        with patch("sys.argv", ["chora"]):
+            with patch("chora.cli.Path") as mock_path:
+                mock_path.return_value = config_file
+                with pytest.raises(SystemExit):
+                    parse_arguments()
 
     def test_parse_arguments_with_config_file_overrides(self, tmp_path: Path) -> None:
         """Test parsing arguments with config file overriding defaults."""
@@ -236,6 +260,10 @@ host = "custom.host"
                 "5000",
                 "--host",
                 "example.com",
+                "--threads",
+                "4",
+                "--asgi",
+                "--reuse-port",
             ],
         ):
             args = parse_arguments()
@@ -243,6 +271,9 @@ host = "custom.host"
             assert args.root == "/custom/path"
             assert args.port == 5000
             assert args.host == "example.com"
+            assert args.threads == 4
+            assert args.asgi is True
+            assert args.reuse_port is True
 
     def test_parse_arguments_config_with_extra_settings(self, tmp_path: Path) -> None:
         """Test that extra config settings don't break argument parsing."""
@@ -0,0 +1,97 @@
+"""
+Tests for HANDLE script resolution shared by the front ends.
+"""
+
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from chora.dynamic import _HandleOutputCache, resolve_handle
+
+
+def make_handle(directory: Path, output: str) -> Path:
+    """Write an executable HANDLE script that prints output."""
+    directory.mkdir(parents=True, exist_ok=True)
+    script = directory / "HANDLE"
+    script.write_text(f"#!/bin/sh\necho '{output}'\n")
+    script.chmod(0o755)
+    return script
+
+
+def test_resolve_handle_runs_executor(tmp_path: Path) -> None:
+    """Test that the executor's output is taken relative to the script."""
+    script = make_handle(tmp_path / "route", "unused")
+    execute = MagicMock(return_value="answer\n")
+
+    response_dir = resolve_handle(str(tmp_path / "route"), "/req", b"d", execute)
+
+    execute.assert_called_once_with(str(script), "/req", False)
+    assert response_dir == str(tmp_path / "route" / "answer")
+
+
+def test_resolve_handle_default_executor(tmp_path: Path) -> None:
+    """Test that by default the script is run as a subprocess."""
+    make_handle(tmp_path / "route", "/absolute/answer")
+
+    assert resolve_handle(str(tmp_path / "route"), "/req", b"d") == "/absolute/answer"
+
+
+def test_resolve_handle_uses_cache(tmp_path: Path) -> None:
+    """Test that a cacheable script is only executed once per request."""
+    make_handle(tmp_path / "route", "unused")
+    (tmp_path / "route" / "HANDLE.cache").touch()
+    execute = MagicMock(return_value="answer")
+
+    for digest in (b"one", b"one", b"two"):
+        resolve_handle(str(tmp_path / "route"), "/req", digest, execute)
+
+    assert execute.call_count == 2
+
+
+def test_resolve_handle_requires_executable(tmp_path: Path) -> None:
+    """Test that a script without the execute bit is refused."""
+    make_handle(tmp_path / "route", "answer").chmod(0o644)
+    execute = MagicMock()
+
+    with pytest.raises(PermissionError):
+        resolve_handle(str(tmp_path / "route"), "/req", b"d", execute)
+    execute.assert_not_called()
+
+
+def test_handle_output_cache_ttl(tmp_path: Path) -> None:
+    """Test that a number in HANDLE.cache expires answers after that many seconds."""
+    handler = tmp_path / "HANDLE"
+    handler.touch()
+    (tmp_path / "HANDLE.cache").write_text("5\n")
+    cache = _HandleOutputCache()
+
+    key = cache.key(str(tmp_path), str(handler), b"digest")
+    assert key is not None
+    with patch("chora.dynamic.time.monotonic", return_value=100.0):
+        cache.put(key, "answer")
+    with patch("chora.dynamic.time.monotonic", return_value=104.0):
+        assert cache.get(key) == "answer"
+    with patch("chora.dynamic.time.monotonic", return_value=106.0):
+        assert cache.get(key) is None
+
+
+def test_handle_output_cache_requires_marker(tmp_path: Path) -> None:
+    """Test that scripts without HANDLE.cache are never cached."""
+    handler = tmp_path / "HANDLE"
+    handler.touch()
+
+    with patch("builtins.open", side_effect=AssertionError("marker was opened")):
+        key = _HandleOutputCache().key(str(tmp_path), str(handler), b"digest")
+    assert key is None
+
+
+@pytest.mark.parametrize("ttl", ["nan", "inf", "-5", "soon"])
+def test_handle_output_cache_rejects_invalid_ttl(tmp_path: Path, ttl: str) -> None:
+    """Test that a non-numeric, non-finite or negative lifetime is an error."""
+    handler = tmp_path / "HANDLE"
+    handler.touch()
+    (tmp_path / "HANDLE.cache").write_text(ttl)
+
+    with pytest.raises(ValueError):
+        _HandleOutputCache().key(str(tmp_path), str(handler), b"digest")
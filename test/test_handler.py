@@ -1,6 +1,24 @@
+import http.client
+import os
+import socket
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+
 import pytest
 from conftest import TestClient, make_static_route
 
+from chora.handler import (
+    SENDFILE_THRESHOLD,
+    ChoraHTTPRequestHandler,
+    FileBody,
+    _load_static,
+    _RouteTree,
+    _ScratchDirs,
+    _slurp,
+    _spit,
+)
+
 
 def test_handle_static(test_client: TestClient) -> None:
     """Test that static routes are handled properly."""
@@ -486,3 +504,667 @@ def test_template_fallback_chain(test_client: TestClient) -> None:
     assert response.status_code == 200
     assert response.get_header("Content-Type") == "application/json"
     assert response.json() == {"template_level": "user_template", "fallback": "success"}
+
+
+def test_static_response_is_cached(test_client: TestClient) -> None:
+    """Test that repeated requests to a static route are served from the cache."""
+    test_dir = test_client.tmp_path / "cached" / "GET"
+    make_static_route(test_dir, body={"cached": True})
+
+    _load_static.cache_clear()
+    test_client.get("/cached")
+    response = test_client.get("/cached")
+
+    assert response.status_code == 200
+    assert response.json() == {"cached": True}
+    assert _load_static.cache_info().hits == 1
+
+
+def test_static_cache_invalidated_on_edit(test_client: TestClient) -> None:
+    """Test that editing a static route's files is picked up on the next request."""
+    test_dir = test_client.tmp_path / "edited" / "GET"
+    make_static_route(test_dir, body={"version": 1})
+
+    assert test_client.get("/edited").json() == {"version": 1}
+
+    make_static_route(test_dir, status_code=201, body={"version": 22})
+    response = test_client.get("/edited")
+
+    assert response.status_code == 201
+    assert response.json() == {"version": 22}
+
+
+def test_slurp_spit_round_trip(tmp_path: Path) -> None:
+    """Test that the raw file helpers preserve content exactly."""
+    target = tmp_path / "blob"
+    payload = bytes(range(256)) * 1024
+
+    _spit(target, payload)
+    assert _slurp(target) == payload
+
+    _spit(target, b"short")
+    assert _slurp(target) == b"short"
+
+
+def test_status_file_with_surrounding_whitespace(test_client: TestClient) -> None:
+    """Test that STATUS files with padding and a trailing newline still parse."""
+    test_dir = test_client.tmp_path / "padded_status" / "GET"
+    make_static_route(test_dir, body="accepted")
+    (test_dir / "STATUS").write_text("  202 \n")
+
+    response = test_client.get("/padded_status")
+
+    assert response.status_code == 202
+    assert response.json() == "accepted"
+
+
+def test_headers_file_with_crlf_and_colons_in_values(test_client: TestClient) -> None:
+    """Test that CRLF line endings and colons inside header values are handled."""
+    test_dir = test_client.tmp_path / "crlf_headers" / "GET"
+    make_static_route(test_dir, body="ok")
+    (test_dir / "HEADERS").write_bytes(
+        b"X-Target:  http://example.com:8080/path \r\nnot a header\r\nX-Empty:\r\n"
+    )
+
+    response = test_client.get("/crlf_headers")
+
+    assert response.status_code == 200
+    assert response.get_header("X-Target") == "http://example.com:8080/path"
+    assert response.get_header("X-Empty") == ""
+
+
+def test_template_resolution_uses_route_tree(test_client: TestClient) -> None:
+    """Test that templated paths resolve from memory once the tree is built."""
+    template_dir = test_client.tmp_path / "items" / "__TEMPLATE__" / "GET"
+    make_static_route(template_dir, body={"item": "template"})
+    assert test_client.get("/items/1").json() == {"item": "template"}
+
+    with patch("chora.handler.os.scandir") as mock_scandir:
+        for _ in range(3):
+            response = test_client.get("/items/42")
+            assert response.json() == {"item": "template"}
+
+    mock_scandir.assert_not_called()
+
+
+class TestRouteTree:
+    """Test the in-memory directory tree used for __TEMPLATE__ lookups."""
+
+    def test_literal_names_win_over_templates(self, tmp_path: Path) -> None:
+        """Test that a literal directory is preferred at every level."""
+        (tmp_path / "a" / "__TEMPLATE__" / "GET").mkdir(parents=True)
+        (tmp_path / "__TEMPLATE__" / "b" / "GET").mkdir(parents=True)
+        routes = _RouteTree(tmp_path)
+
+        assert routes.find(str(tmp_path / "a" / "b" / "GET")) == str(
+            tmp_path / "a" / "__TEMPLATE__" / "GET"
+        )
+        assert routes.find(str(tmp_path / "x" / "b" / "GET")) == str(
+            tmp_path / "__TEMPLATE__" / "b" / "GET"
+        )
+
+    def test_backtracks_out_of_dead_ends(self, tmp_path: Path) -> None:
+        """Test that a literal prefix without a match falls back to a template."""
+        (tmp_path / "a" / "c").mkdir(parents=True)
+        (tmp_path / "__TEMPLATE__" / "b").mkdir(parents=True)
+        routes = _RouteTree(tmp_path)
+
+        assert routes.find(str(tmp_path / "a" / "b")) == str(
+            tmp_path / "__TEMPLATE__" / "b"
+        )
+
+    def test_outside_root_is_not_resolved(self, tmp_path: Path) -> None:
+        """Test that directories outside the root never match a template."""
+        (tmp_path / "root" / "__TEMPLATE__").mkdir(parents=True)
+        routes = _RouteTree(tmp_path / "root")
+
+        assert routes.find(str(tmp_path / "elsewhere")) is None
+
+    def test_unknown_path_does_not_rebuild(self, tmp_path: Path) -> None:
+        """Test that a miss on an unchanged tree doesn't walk it again."""
+        (tmp_path / "users" / "__TEMPLATE__").mkdir(parents=True)
+        routes = _RouteTree(tmp_path)
+
+        with patch.object(routes, "reload") as mock_reload:
+            assert routes.find(str(tmp_path / "nope" / "GET")) is None
+
+        mock_reload.assert_not_called()
+
+    def test_removed_template_is_noticed(self, tmp_path: Path) -> None:
+        """Test that a template deleted from disk stops matching."""
+        template = tmp_path / "__TEMPLATE__"
+        template.mkdir()
+        routes = _RouteTree(tmp_path)
+        assert routes.find(str(tmp_path / "x")) == str(template)
+
+        template.rmdir()
+
+        assert routes.find(str(tmp_path / "x")) is None
+
+    def test_follows_symlinked_directories(self, tmp_path: Path) -> None:
+        """Test that templates under a symlinked subtree resolve."""
+        (tmp_path / "shared" / "users" / "__TEMPLATE__" / "GET").mkdir(parents=True)
+        root = tmp_path / "root"
+        root.mkdir()
+        (root / "api").symlink_to(tmp_path / "shared")
+        routes = _RouteTree(root)
+
+        with patch.object(routes, "reload") as mock_reload:
+            assert routes.find(str(root / "api" / "users" / "5" / "GET")) == str(
+                root / "api" / "users" / "__TEMPLATE__" / "GET"
+            )
+            assert routes.find(str(root / "api" / "nope" / "GET")) is None
+
+        mock_reload.assert_not_called()
+
+    def test_symlink_cycle_is_not_followed_forever(self, tmp_path: Path) -> None:
+        """Test that a symlink back to an ancestor ends the walk."""
+        (tmp_path / "a" / "__TEMPLATE__").mkdir(parents=True)
+        (tmp_path / "a" / "loop").symlink_to(tmp_path / "a")
+        routes = _RouteTree(tmp_path)
+
+        assert routes.find(str(tmp_path / "a" / "x")) == str(
+            tmp_path / "a" / "__TEMPLATE__"
+        )
+        with patch.object(routes, "reload") as mock_reload:
+            assert routes.find(str(tmp_path / "a" / "loop" / "loop" / "x")) is None
+        mock_reload.assert_not_called()
+
+    def test_unlistable_directory_is_not_stale(self, tmp_path: Path) -> None:
+        """Test that a directory which can't be listed doesn't force rebuilds."""
+        (tmp_path / "locked").mkdir()
+        scandir = os.scandir
+
+        def refuse_locked(path: str) -> Any:
+            if path == str(tmp_path / "locked"):
+                raise PermissionError(path)
+            return scandir(path)
+
+        with patch("chora.handler.os.scandir", side_effect=refuse_locked):
+            routes = _RouteTree(tmp_path)
+
+        with patch.object(routes, "reload") as mock_reload:
+            assert routes.find(str(tmp_path / "locked" / "x")) is None
+        mock_reload.assert_not_called()
+
+    def test_reload(self, tmp_path: Path) -> None:
+        """Test that reload picks up changes regardless of directory stamps."""
+        stamp = tmp_path.stat().st_mtime_ns
+        routes = _RouteTree(tmp_path)
+        template = tmp_path / "__TEMPLATE__"
+        template.mkdir()
+        # Hide the change from the mtime check.
+        os.utime(tmp_path, ns=(stamp, stamp))
+
+        assert routes.find(str(tmp_path / "x")) is None
+        routes.reload()
+        assert routes.find(str(tmp_path / "x")) == str(template)
+
+
+def test_template_added_after_not_found(test_client: TestClient) -> None:
+    """Test that a 404 is not cached once a matching template is created."""
+    (test_client.tmp_path / "late").mkdir()
+    assert test_client.get("/late/7").status_code == 404
+
+    make_static_route(
+        test_client.tmp_path / "late" / "__TEMPLATE__" / "GET", body="found"
+    )
+
+    response = test_client.get("/late/7")
+    assert response.status_code == 200
+    assert response.json() == "found"
+
+
+def test_static_route_skips_request_tmpdir(test_client: TestClient) -> None:
+    """Test that static routes don't write the request to a temporary directory."""
+    make_static_route(test_client.tmp_path / "no_tmpdir" / "GET", body="static")
+
+    with patch("chora.handler.scratch_dirs.checkout") as mock_tmpdir:
+        response = test_client.get("/no_tmpdir")
+
+    assert response.status_code == 200
+    assert response.json() == "static"
+    mock_tmpdir.assert_not_called()
+
+
+def test_persistent_handle_script(test_client: TestClient) -> None:
+    """Test that a HANDLE.persistent script is fed requests over stdin."""
+    handler_dir = test_client.tmp_path / "persistent" / "GET"
+    handler_dir.mkdir(parents=True)
+
+    handle_script = handler_dir / "HANDLE"
+    handle_script.write_text("""#!/bin/sh
+while read dir; do
+    if grep "who=me" "$dir/REQUEST" >/dev/null; then
+        echo "me"
+    else
+        echo "anyone"
+    fi
+done
+""")
+    handle_script.chmod(0o755)
+    (handler_dir / "HANDLE.persistent").touch()
+
+    make_static_route(handler_dir / "me", body="me")
+    make_static_route(handler_dir / "anyone", body="anyone")
+
+    assert test_client.get("/persistent?who=me").json() == "me"
+    assert test_client.get("/persistent").json() == "anyone"
+
+
+def test_response_built_in_request_directory_is_not_cached(
+    test_client: TestClient,
+) -> None:
+    """Test that responses a script writes under $1 aren't served to later requests.
+
+    The scratch directory is reused, and the script pins the timestamps the way
+    cp -p does, so only the contents tell the two responses apart.
+    """
+    handler_dir = test_client.tmp_path / "echo" / "POST"
+    handler_dir.mkdir(parents=True)
+    handle_script = handler_dir / "HANDLE"
+    handle_script.write_text("""#!/bin/sh
+mkdir "$1/resp"
+echo 200 > "$1/resp/STATUS"
+: > "$1/resp/HEADERS"
+cp "$1/DATA" "$1/resp/DATA"
+touch -t 200001010000 "$1/resp/STATUS" "$1/resp/HEADERS" "$1/resp/DATA"
+echo "$1/resp"
+""")
+    handle_script.chmod(0o755)
+
+    for payload in (b"0000", b"0004"):
+        response = test_client.post("/echo", payload)
+        assert response.status_code == 200
+        assert response.data == payload
+
+
+def test_handle_script_pointing_at_itself(test_client: TestClient) -> None:
+    """Test that a HANDLE script answering with its own folder gives a 500."""
+    handler_dir = test_client.tmp_path / "loop" / "GET"
+    handler_dir.mkdir(parents=True)
+    handle_script = handler_dir / "HANDLE"
+    handle_script.write_text("#!/bin/sh\necho .\n")
+    handle_script.chmod(0o755)
+
+    response = test_client.get("/loop")
+
+    assert response.status_code == 500
+    assert "chained HANDLE scripts" in response.text
+
+
+def test_persistent_handle_script_timeout(test_client: TestClient) -> None:
+    """Test that a HANDLE.persistent script which never answers gives a 504."""
+    handler_dir = test_client.tmp_path / "stuck" / "GET"
+    handler_dir.mkdir(parents=True)
+
+    handle_script = handler_dir / "HANDLE"
+    handle_script.write_text("#!/bin/sh\nwhile read dir; do sleep 10; done\n")
+    handle_script.chmod(0o755)
+    (handler_dir / "HANDLE.persistent").touch()
+
+    with patch("chora.pool.handler_pool.timeout", 0.2):
+        response = test_client.get("/stuck")
+
+    assert response.status_code == 504
+
+
+def test_response_is_sent_in_one_write() -> None:
+    """Test that the status line, headers and body go out in a single write."""
+    handler = ChoraHTTPRequestHandler.__new__(ChoraHTTPRequestHandler)
+    handler.request_version = "HTTP/1.0"
+    handler.requestline = "GET / HTTP/1.0"
+    handler.command = "GET"
+    handler.close_connection = False
+    handler.client_address = ("127.0.0.1", 0)
+    handler.wfile = MagicMock()
+
+    with patch.object(handler, "log_message"):
+        handler._send_response(201, b"body", {"X-Test": "yes"})
+
+    handler.wfile.write.assert_called_once()
+    (written,) = handler.wfile.write.call_args.args
+    head, _, body = written.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 201 Created\r\n")
+    assert b"\r\nX-Test: yes" in head
+    assert body == b"body"
+
+
+def test_keep_alive_connection_is_reused(test_client: TestClient) -> None:
+    """Test that several requests can be served over one HTTP/1.1 connection."""
+    make_static_route(
+        test_client.tmp_path / "alive" / "GET",
+        headers={"Content-Length": "9999", "Transfer-Encoding": "chunked"},
+        body="still here",
+    )
+    make_static_route(test_client.tmp_path / "alive" / "HEAD", body="headless")
+    make_static_route(test_client.tmp_path / "alive" / "POST", body="posted")
+
+    conn = http.client.HTTPConnection(test_client.base_url.removeprefix("http://"))
+    try:
+        for _ in range(3):
+            conn.request("GET", "/alive")
+            response = conn.getresponse()
+            assert response.status == 200
+            assert response.getheader("Connection") == "keep-alive"
+            assert response.getheader("Content-Length") == str(len(b'"still here"'))
+            assert response.getheader("Transfer-Encoding") is None
+            assert response.read() == b'"still here"'
+
+        conn.request("POST", "/missing", body=b"unread body")
+        response = conn.getresponse()
+        assert response.status == 404
+        response.read()
+
+        conn.request("HEAD", "/alive")
+        response = conn.getresponse()
+        assert response.status == 200
+        assert response.getheader("Content-Length") == str(len(b'"headless"'))
+        assert response.read() == b""
+
+        conn.request("POST", "/alive", body=b"payload")
+        response = conn.getresponse()
+        assert response.read() == b'"posted"'
+    finally:
+        conn.close()
+
+
+def test_route_can_close_connection(test_client: TestClient) -> None:
+    """Test that a route sending Connection: close ends the connection."""
+    make_static_route(
+        test_client.tmp_path / "closing" / "GET",
+        headers={"Connection": "close"},
+        body="bye",
+    )
+
+    conn = http.client.HTTPConnection(test_client.base_url.removeprefix("http://"))
+    try:
+        conn.request("GET", "/closing")
+        response = conn.getresponse()
+        assert response.getheader("Connection") == "close"
+        assert response.read() == b'"bye"'
+        assert response.will_close
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("status_code", [204, 304])
+def test_bodiless_status_keeps_connection_usable(
+    test_client: TestClient, status_code: int
+) -> None:
+    """Test that 204 and 304 go out without a body or Content-Length."""
+    make_static_route(
+        test_client.tmp_path / "empty" / "GET", status_code=status_code, body={}
+    )
+    make_static_route(test_client.tmp_path / "alive" / "GET", body="alive")
+
+    conn = http.client.HTTPConnection(test_client.base_url.removeprefix("http://"))
+    try:
+        conn.request("GET", "/empty")
+        response = conn.getresponse()
+        assert response.status == status_code
+        assert response.getheader("Content-Length") is None
+        assert response.read() == b""
+
+        conn.request("GET", "/alive")
+        response = conn.getresponse()
+        assert response.status == 200
+        assert response.read() == b'"alive"'
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("method", ["PUT", "DELETE", "PATCH", "OPTIONS", "PURGE"])
+def test_other_methods_are_routed(test_client: TestClient, method: str) -> None:
+    """Test that methods besides GET map onto their own directories."""
+    make_static_route(test_client.tmp_path / "verbs" / method, body=method)
+
+    response = test_client.request(method, "/verbs")
+
+    assert response.status_code == 200
+    assert response.data == f'"{method}"'.encode()
+
+
+def test_binary_request_body_reaches_handle_script(test_client: TestClient) -> None:
+    """Test that non-UTF-8 request bodies are passed through to DATA untouched."""
+    handler_dir = test_client.tmp_path / "binary" / "POST"
+    handler_dir.mkdir(parents=True)
+    handle_script = handler_dir / "HANDLE"
+    handle_script.write_text(f"""#!/bin/sh
+cp "$1/DATA" "{test_client.tmp_path}/received"
+echo "ok"
+""")
+    handle_script.chmod(0o755)
+    make_static_route(handler_dir / "ok", body="ok")
+
+    payload = b"\xff\xfe\x00binary\x80"
+    response = test_client.post("/binary", payload)
+
+    assert response.status_code == 200
+    assert (test_client.tmp_path / "received").read_bytes() == payload
+
+
+def test_static_headers_are_serialised_on_load(tmp_path: Path) -> None:
+    """Test that cached static headers carry a ready-to-send header block."""
+    make_static_route(
+        tmp_path,
+        headers={
+            "Content-Type": "text/plain",
+            "Content-Length": "1",
+            "Connection": "close",
+            "X-Extra": "a:b",
+        },
+    )
+
+    _, _, headers = _load_static(str(tmp_path), (0,))
+
+    assert headers["Content-Type"] == "text/plain"
+    assert headers.wire == b"Content-Type: text/plain\r\nX-Extra: a:b\r\n"
+    assert headers.connection == "close"
+
+
+def test_scratch_dirs_are_recycled() -> None:
+    """Test that request directories are reused and tidied between requests."""
+    scratch = _ScratchDirs()
+    try:
+        with scratch.checkout() as first:
+            for name in ("REQUEST", "HEADERS", "DATA", "stray"):
+                (Path(first) / name).write_text(name)
+            (Path(first) / "nested").mkdir()
+
+            with scratch.checkout() as concurrent:
+                assert concurrent != first
+
+        with scratch.checkout() as again:
+            assert again == first
+            assert sorted(os.listdir(again)) == ["DATA", "HEADERS", "REQUEST"]
+    finally:
+        scratch.close()
+
+    assert not os.path.exists(first)
+    assert not os.path.exists(concurrent)
+
+
+def test_request_headers_reach_handle_script_unchanged(
+    test_client: TestClient,
+) -> None:
+    """Test that HEADERS holds the request headers as sent, one per line."""
+    handler_dir = test_client.tmp_path / "echo_headers" / "GET"
+    handler_dir.mkdir(parents=True)
+    handle_script = handler_dir / "HANDLE"
+    handle_script.write_text(f"""#!/bin/sh
+cp "$1/HEADERS" "{test_client.tmp_path}/received"
+echo "ok"
+""")
+    handle_script.chmod(0o755)
+    make_static_route(handler_dir / "ok", body="ok")
+
+    long_value = "a " * 60 + "end"
+    conn = http.client.HTTPConnection(test_client.base_url.removeprefix("http://"))
+    try:
+        conn.putrequest("GET", "/echo_headers", skip_accept_encoding=True)
+        conn.putheader("X-Long", long_value)
+        conn.putheader("X-Utf8", "café".encode())
+        conn.endheaders()
+        response = conn.getresponse()
+        assert response.status == 200
+        response.read()
+    finally:
+        conn.close()
+
+    received = (test_client.tmp_path / "received").read_bytes().splitlines()
+    assert f"X-Long: {long_value}".encode() in received
+    assert "X-Utf8: café".encode() in received
+
+
+def test_cached_handle_script_runs_once_per_request(test_client: TestClient) -> None:
+    """Test that a HANDLE.cache script is only run for requests it hasn't seen."""
+    handler_dir = test_client.tmp_path / "memo" / "GET"
+    handler_dir.mkdir(parents=True)
+    runs = test_client.tmp_path / "runs"
+    handle_script = handler_dir / "HANDLE"
+    handle_script.write_text(f"""#!/bin/sh
+echo run >> "{runs}"
+echo "answer"
+""")
+    handle_script.chmod(0o755)
+    (handler_dir / "HANDLE.cache").touch()
+    make_static_route(handler_dir / "answer", body="answer")
+
+    for _ in range(3):
+        assert test_client.get("/memo?a=1").json() == "answer"
+    assert runs.read_text().count("run") == 1
+
+    assert test_client.get("/memo?a=2").json() == "answer"
+    assert runs.read_text().count("run") == 2
+
+    # Editing the script invalidates what it answered before.
+    handle_script.write_text(handle_script.read_text() + "\n")
+    assert test_client.get("/memo?a=1").json() == "answer"
+    assert runs.read_text().count("run") == 3
+
+
+def test_large_data_is_sent_from_disk(test_client: TestClient) -> None:
+    """Test that DATA files over the threshold are streamed intact with sendfile."""
+    payload = os.urandom(SENDFILE_THRESHOLD * 3 + 7)
+    make_static_route(test_client.tmp_path / "big" / "GET")
+    make_static_route(test_client.tmp_path / "big" / "HEAD")
+    (test_client.tmp_path / "big" / "GET" / "DATA").write_bytes(payload)
+    (test_client.tmp_path / "big" / "HEAD" / "DATA").write_bytes(payload)
+
+    conn = http.client.HTTPConnection(test_client.base_url.removeprefix("http://"))
+    try:
+        conn.request("GET", "/big")
+        response = conn.getresponse()
+        assert response.getheader("Content-Length") == str(len(payload))
+        assert response.read() == payload
+
+        # The connection is still usable after the body went out separately.
+        conn.request("HEAD", "/big")
+        response = conn.getresponse()
+        assert response.getheader("Content-Length") == str(len(payload))
+        assert response.read() == b""
+
+        conn.request("GET", "/big")
+        assert conn.getresponse().read() == payload
+    finally:
+        conn.close()
+
+
+def test_large_data_removed_before_sending(tmp_path: Path) -> None:
+    """Test that a large DATA file deleted after loading gives a 404."""
+    make_static_route(tmp_path)
+    data_file = tmp_path / "DATA"
+    data_file.write_bytes(b"x" * (SENDFILE_THRESHOLD + 1))
+    _, data, _ = _load_static(str(tmp_path), (0,))
+    assert isinstance(data, FileBody)
+    handler = MagicMock()
+    data_file.unlink()
+
+    with pytest.raises(FileNotFoundError):
+        ChoraHTTPRequestHandler._send_response(handler, 200, data, {})
+    handler.wfile.write.assert_not_called()
+
+
+def test_large_data_closed_on_error(tmp_path: Path) -> None:
+    """Test that a DATA file opened for sendfile is closed if sending fails."""
+    data_file = tmp_path / "DATA"
+    data_file.write_bytes(b"x" * (SENDFILE_THRESHOLD + 1))
+    opened = []
+    real_open = open
+
+    def tracking_open(*args: Any, **kwargs: Any) -> Any:
+        opened.append(real_open(*args, **kwargs))
+        return opened[-1]
+
+    with patch("builtins.open", tracking_open):
+        with pytest.raises(UnicodeEncodeError):
+            ChoraHTTPRequestHandler._send_response(
+                MagicMock(), 200, FileBody(str(data_file)), {"X-Name": "\u2603"}
+            )
+
+    assert opened
+    assert all(f.closed for f in opened)
+
+
+def test_client_reuses_connection(test_client: TestClient) -> None:
+    """Test that successive requests from the test client share one socket."""
+    make_static_route(test_client.tmp_path / "reuse" / "GET", body="again")
+
+    assert test_client.get("/reuse").json() == "again"
+    sock = test_client._conn.sock
+    assert test_client.get("/missing").status_code == 404
+    assert test_client.get("/reuse").json() == "again"
+
+    assert test_client._conn.sock is sock
+
+
+def test_chunked_request_body_is_decoded(test_client: TestClient) -> None:
+    """Test that a chunked body reaches DATA and doesn't leak into the next request."""
+    handler_dir = test_client.tmp_path / "chunked" / "POST"
+    handler_dir.mkdir(parents=True)
+    handle_script = handler_dir / "HANDLE"
+    handle_script.write_text(f"""#!/bin/sh
+cp "$1/DATA" "{test_client.tmp_path}/received"
+echo "ok"
+""")
+    handle_script.chmod(0o755)
+    make_static_route(handler_dir / "ok", body="ok")
+    make_static_route(test_client.tmp_path / "chunked" / "GET", body="after")
+
+    conn = http.client.HTTPConnection(test_client.base_url.removeprefix("http://"))
+    try:
+        conn.request("POST", "/chunked", body=iter([b"pay", b"load"]))
+        response = conn.getresponse()
+        assert response.status == 200
+        response.read()
+
+        conn.request("GET", "/chunked")
+        response = conn.getresponse()
+        assert response.status == 200
+        assert response.read() == b'"after"'
+    finally:
+        conn.close()
+
+    assert (test_client.tmp_path / "received").read_bytes() == b"payload"
+
+
+@pytest.mark.parametrize(
+    "framing",
+    [b"Content-Length: -1", b"Transfer-Encoding: gzip", b"Content-Length: nope"],
+)
+def test_undelimited_request_body_closes_connection(
+    test_client: TestClient, framing: bytes
+) -> None:
+    """Test that a body of unknown length gets a 500 and a closed connection."""
+    make_static_route(test_client.tmp_path / "framed" / "POST", body="framed")
+    host, port = test_client.base_url.removeprefix("http://").split(":")
+
+    with socket.create_connection((host, int(port)), timeout=2) as sock:
+        sock.sendall(b"POST /framed HTTP/1.1\r\nHost: x\r\n" + framing + b"\r\n\r\n")
+        response = b""
+        while chunk := sock.recv(4096):
+            response += chunk
+
+    assert response.startswith(b"HTTP/1.1 500 ")
+    assert b"Connection: close\r\n" in response
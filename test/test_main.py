@@ -1,152 +1,217 @@
-import os
+import copy
+import sys
 from pathlib import Path
-from typing import Generator
-from unittest.mock import Mock, patch
+from types import SimpleNamespace
+from typing import Callable, Generator
+from unittest.mock import Mock
 
 import pytest
 
+from chora import __main__ as _chora_main
 from chora.__main__ import main
+from chora.server import DEFAULT_THREADS
 
+HOST = "localhost"
+PORT = 8000
+THREADS = DEFAULT_THREADS
 
-@pytest.fixture
-def root(tmp_path: Path) -> Path:
-    """Fixture that provides the default root directory."""
-    root_dir = tmp_path / "test-root"
-    root_dir.mkdir(exist_ok=True)
-    return root_dir
 
+@pytest.fixture(scope="session")
+def root(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Fixture that provides the default root directory, shared by all tests.
 
-@pytest.fixture
-def host() -> str:
-    """Fixture that provides the default host."""
-    return "localhost"
+    main() only checks that the root exists, so no test writes to it. Tests
+    that need their own directory use tmp_path instead.
+    """
+    return tmp_path_factory.mktemp("test-root")
+
+
+@pytest.fixture(scope="module")
+def _start_server_patch() -> Generator[Mock, None, None]:
+    """Fixture that patches start_server once for the whole module."""
+    mock = Mock()
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(_chora_main, "start_server", mock)
+        yield mock
+
+
+@pytest.fixture(scope="module")
+def _parse_arguments_patch() -> Generator[Mock, None, None]:
+    """Fixture that patches parse_arguments once for the whole module."""
+    mock = Mock()
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(_chora_main, "parse_arguments", mock)
+        yield mock
+
+
+@pytest.fixture(scope="module")
+def _sys_exit_patch() -> Generator[Mock, None, None]:
+    """Fixture that patches sys.exit once for the whole module."""
+    mock = Mock(side_effect=SystemExit)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(sys, "exit", mock)
+        yield mock
 
 
 @pytest.fixture
-def port() -> int:
-    """Fixture that provides the default port."""
-    return 8000
+def mock_exit(_sys_exit_patch: Mock) -> Mock:
+    """Fixture that provides a mock for sys.exit, reset for each test."""
+    _sys_exit_patch.reset_mock()
+    return _sys_exit_patch
 
 
 @pytest.fixture(autouse=True)
-def mock_start_server() -> Generator[Mock, None, None]:
-    """Fixture that provides a mock for start_server."""
-    with patch("chora.__main__.start_server") as mock:
-        yield mock
+def mock_start_server(_start_server_patch: Mock) -> Mock:
+    """Fixture that provides a mock for start_server, reset for each test."""
+    _start_server_patch.reset_mock(return_value=True, side_effect=True)
+    return _start_server_patch
+
+
+@pytest.fixture(scope="session")
+def _args_prototype() -> SimpleNamespace:
+    """Fixture that builds the parsed arguments once, to be copied per test."""
+    return SimpleNamespace(threads=THREADS, asgi=False, reuse_port=False)
 
 
 @pytest.fixture
 def mock_parse_arguments(
-    root: Path, host: str, port: int
-) -> Generator[Mock, None, None]:
-    """Fixture that provides a mock for parse_arguments."""
-    with patch("chora.__main__.parse_arguments") as mock:
-        mock_args = Mock()
-        mock_args.root = root
-        mock_args.host = host
-        mock_args.port = port
-        mock.return_value = mock_args
-        yield mock
+    _parse_arguments_patch: Mock, _args_prototype: SimpleNamespace
+) -> Mock:
+    """Fixture that provides a mock for parse_arguments, reset for each test.
+
+    The root, host and port are left for each test to set with configure_args.
+    """
+    mock = _parse_arguments_patch
+    mock.reset_mock(return_value=True, side_effect=True)
+    # main() only reads attributes, so a plain namespace stands in for the
+    # argparse result.
+    mock.return_value = copy.copy(_args_prototype)
+    return mock
+
+
+def configure_args(
+    mock_parse_arguments: Mock, root: Path | str, host: str = HOST, port: int = PORT
+) -> None:
+    """Set the arguments that mock_parse_arguments hands to main()."""
+    args = mock_parse_arguments.return_value
+    args.root = root
+    args.host = host
+    args.port = port
 
 
 class TestMain:
+    @pytest.mark.parametrize(
+        "make_root_arg",
+        [
+            pytest.param(lambda root: root, id="path"),
+            pytest.param(str, id="string"),
+            pytest.param(lambda root: root.name, id="relative"),
+        ],
+    )
     def test_successful_execution(
         self,
+        make_root_arg: Callable[[Path], Path | str],
         mock_parse_arguments: Mock,
         mock_start_server: Mock,
         root: Path,
-        host: str,
-        port: int,
+        monkeypatch: pytest.MonkeyPatch,
         capsys: pytest.CaptureFixture[str],
     ) -> None:
         """Test successful execution of main function."""
+        # Relative roots resolve against the working directory; monkeypatch
+        # restores it afterwards.
+        monkeypatch.chdir(root.parent)
+        root_arg = make_root_arg(root)
+        configure_args(mock_parse_arguments, root_arg)
+
         main()
 
         # Verify parse_arguments was called
         mock_parse_arguments.assert_called_once()
-        mock_start_server.assert_called_once_with(root, host, port)
+        mock_start_server.assert_called_once_with(
+            Path(root_arg), HOST, PORT, THREADS, asgi=False, reuse_port=False
+        )
+        assert isinstance(mock_start_server.call_args[0][0], Path)
 
-        # Verify print statements were called
+        # Verify print statements were called; root is already absolute, so
+        # it is what main() prints for every row, the relative one included.
         captured = capsys.readouterr()
         expected_output = (
             "Starting chora server...\n"
-            f"  Root directory: {root.absolute()}\n"
-            "  Server address: http://localhost:8000\n"
+            f"  Root directory: {root}\n"
+            f"  Server address: http://{HOST}:{PORT}\n"
+            f"  Worker threads: {THREADS}\n"
             "  Press Ctrl+C to stop the server\n"
         )
         assert captured.out == expected_output
 
-    @patch("sys.exit", side_effect=SystemExit)
-    @pytest.mark.parametrize("root", [Path("/absolute/path"), Path("relative/path")])
-    def test_root_directory_does_not_exist(
+    def test_asgi_banner(
         self,
-        mock_exit: Mock,
         mock_parse_arguments: Mock,
+        mock_start_server: Mock,
         root: Path,
         capsys: pytest.CaptureFixture[str],
     ) -> None:
-        with pytest.raises(SystemExit):
-            main()
+        """Test that the thread count isn't advertised when serving with uvicorn."""
+        configure_args(mock_parse_arguments, root)
+        mock_parse_arguments.return_value.asgi = True
 
-        # Verify error message was printed to stdout
+        main()
+
+        mock_start_server.assert_called_once_with(
+            root, HOST, PORT, THREADS, asgi=True, reuse_port=False
+        )
         captured = capsys.readouterr()
-        assert f"Error: Root directory '{root}' does not exist." in captured.out
+        assert "  Serving with uvicorn (ASGI)\n" in captured.out
+        assert "Worker threads" not in captured.out
 
-    @patch("sys.exit", side_effect=SystemExit)
-    def test_root_path_is_not_directory(
+    @pytest.mark.parametrize("missing", [Path("/absolute/path"), Path("relative/path")])
+    def test_root_directory_does_not_exist(
         self,
         mock_exit: Mock,
         mock_parse_arguments: Mock,
-        mock_start_server: Mock,
-        tmp_path: Path,
+        missing: Path,
         capsys: pytest.CaptureFixture[str],
     ) -> None:
-        """Test main function when root path is not a directory."""
-        # Create a file instead of directory
-        test_file = tmp_path / "test_file.txt"
-        test_file.write_text("")
-        mock_parse_arguments.return_value.root = test_file
+        configure_args(mock_parse_arguments, missing)
 
-        # Execute main
         with pytest.raises(SystemExit):
             main()
+        mock_exit.assert_called_once_with(1)
 
         # Verify error message was printed to stdout
         captured = capsys.readouterr()
-        assert f"Error: Root path '{test_file}' is not a directory." in captured.out
+        assert f"Error: Root directory '{missing}' does not exist." in captured.out
 
-    def test_with_relative_path(
+    def test_root_path_is_not_directory(
         self,
+        mock_exit: Mock,
         mock_parse_arguments: Mock,
         mock_start_server: Mock,
-        tmp_path: Path,
         capsys: pytest.CaptureFixture[str],
     ) -> None:
-        """Test main function with relative path that gets converted to absolute."""
-        # Create a subdirectory
-        # Change to the temp directory so relative path works
-        os.chdir(tmp_path)
-
-        subdir = "api"
-        mock_parse_arguments.return_value.root = tmp_path / subdir
-        (tmp_path / subdir).mkdir()
+        """Test main function when root path is not a directory."""
+        # This test file stands in for a root that is not a directory.
+        test_file = Path(__file__)
+        configure_args(mock_parse_arguments, test_file)
 
         # Execute main
-        main()
+        with pytest.raises(SystemExit):
+            main()
+        mock_exit.assert_called_once_with(1)
 
-        mock_start_server.assert_called_once()
-        call_args = mock_start_server.call_args[0]
-        assert call_args[0], Path("api")
-        assert call_args[1] == "localhost"
-        assert call_args[2] == 8000
+        # Verify error message was printed to stdout
+        captured = capsys.readouterr()
+        assert f"Error: Root path '{test_file}' is not a directory." in captured.out
 
     def test_handles_keyboard_interrupt(
         self,
         mock_parse_arguments: Mock,
         mock_start_server: Mock,
-        capsys: pytest.CaptureFixture[str],
+        root: Path,
     ) -> None:
         """Test that main function handles KeyboardInterrupt from start_server."""
+        configure_args(mock_parse_arguments, root)
         mock_start_server.side_effect = KeyboardInterrupt
 
         with pytest.raises(KeyboardInterrupt):
@@ -154,18 +219,3 @@ class TestMain:
 
         mock_parse_arguments.assert_called_once()
         mock_start_server.assert_called_once()
-
-    def test_path_object_conversion(
-        self,
-        mock_parse_arguments: Mock,
-        mock_start_server: Mock,
-        root: Path,
-        capsys: pytest.CaptureFixture[str],
-    ) -> None:
-        mock_parse_arguments.return_value.root = str(root)
-        main()
-
-        mock_start_server.assert_called_once()
-        root_arg = mock_start_server.call_args[0][0]
-        assert isinstance(root_arg, Path)
-        assert root_arg == root
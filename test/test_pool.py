@@ -0,0 +1,107 @@
+"""
+Tests for the persistent HANDLE process pool.
+"""
+
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Generator
+
+import pytest
+
+from chora.pool import HandlerProcessPool
+
+
+def make_script(path: Path, body: str) -> Path:
+    """Write an executable shell script."""
+    path.write_text(f"#!/bin/sh\n{body}")
+    path.chmod(0o755)
+    return path
+
+
+@pytest.fixture
+def pool() -> Generator[HandlerProcessPool, None, None]:
+    """Fixture that provides a pool, stopping its processes afterwards."""
+    pool = HandlerProcessPool(maxsize=2)
+    yield pool
+    pool.close()
+
+
+def test_process_is_reused(pool: HandlerProcessPool, tmp_path: Path) -> None:
+    """Test that one process answers several requests."""
+    script = make_script(
+        tmp_path / "HANDLE",
+        'while read dir; do echo "$$ $dir"; done\n',
+    )
+
+    answers = [pool.run(script, tmp_path / f"req{i}").split() for i in range(3)]
+
+    assert [dir for _, dir in answers] == [str(tmp_path / f"req{i}") for i in range(3)]
+    assert len({pid for pid, _ in answers}) == 1
+
+
+def test_exiting_script_is_restarted(pool: HandlerProcessPool, tmp_path: Path) -> None:
+    """Test that a script answering a single request and exiting still works."""
+    script = make_script(tmp_path / "HANDLE", 'read dir\necho "$$"\n')
+
+    pids = {pool.run(script, tmp_path).strip() for _ in range(3)}
+
+    assert len(pids) == 3
+
+
+def test_edited_script_is_restarted(pool: HandlerProcessPool, tmp_path: Path) -> None:
+    """Test that editing a script replaces its running process."""
+    script = make_script(tmp_path / "HANDLE", "while read dir; do echo old; done\n")
+    assert pool.run(script, tmp_path) == "old\n"
+
+    make_script(script, "while read dir; do echo newer; done\n")
+
+    assert pool.run(script, tmp_path) == "newer\n"
+    assert len(pool) == 1
+
+
+def test_least_recently_used_is_evicted(
+    pool: HandlerProcessPool, tmp_path: Path
+) -> None:
+    """Test that the pool never holds more than maxsize processes."""
+    for i in range(3):
+        script = make_script(
+            tmp_path / f"HANDLE{i}", f"while read dir; do echo {i}; done\n"
+        )
+        assert pool.run(script, tmp_path) == f"{i}\n"
+
+    assert len(pool) == 2
+
+
+def test_script_that_never_answers(pool: HandlerProcessPool, tmp_path: Path) -> None:
+    """Test that a script which exits without answering raises an error."""
+    script = make_script(tmp_path / "HANDLE", "exit 3\n")
+
+    with pytest.raises(subprocess.CalledProcessError):
+        pool.run(script, tmp_path)
+    assert len(pool) == 0
+
+
+def test_slow_script_times_out(tmp_path: Path) -> None:
+    """Test that a script which never answers is killed after the timeout."""
+    pool = HandlerProcessPool(timeout=0.2)
+    script = make_script(tmp_path / "HANDLE", "while read dir; do sleep 10; done\n")
+    try:
+        with pytest.raises(subprocess.TimeoutExpired):
+            pool.run(script, tmp_path)
+        assert len(pool) == 0
+    finally:
+        pool.close()
+
+
+def test_concurrent_first_requests_share_a_process(
+    pool: HandlerProcessPool, tmp_path: Path
+) -> None:
+    """Test that requests racing to start a script end up with one process."""
+    script = make_script(tmp_path / "HANDLE", 'while read dir; do echo "$$"; done\n')
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        pids = set(executor.map(lambda _: pool.run(script, tmp_path), range(8)))
+
+    assert len(pool) == 1
+    assert pool.run(script, tmp_path) in pids
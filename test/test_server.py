@@ -2,6 +2,9 @@
 Tests for the chora server module.
 """
 
+import http.client
+import signal
+import socket
 import threading
 import time
 from pathlib import Path
@@ -9,8 +12,16 @@ from typing import Any, Generator
 from unittest.mock import MagicMock, patch
 
 import pytest
+from conftest import make_static_route
 
-from chora.server import cleanup, start_server
+from chora.handler import ChoraHTTPRequestHandler, create_handler, read_static
+from chora.server import (
+    DEFAULT_THREADS,
+    ChoraHTTPServer,
+    _reload_on_hangup,
+    cleanup,
+    start_server,
+)
 
 
 @pytest.fixture
@@ -21,8 +32,8 @@ def mock_server() -> MagicMock:
 
 @pytest.fixture
 def mock_http_server() -> Generator[MagicMock, None, None]:
-    """Fixture that provides a mock HTTPServer."""
-    with patch("chora.server.HTTPServer") as mock:
+    """Fixture that provides a mock ChoraHTTPServer."""
+    with patch("chora.server.ChoraHTTPServer") as mock:
         yield mock
 
 
@@ -93,7 +104,7 @@ class TestServerStartup:
         mock_create_handler: MagicMock,
         mock_http_server: MagicMock,
     ) -> None:
-        """Test that start_server creates HTTPServer with correct parameters."""
+        """Test that start_server creates ChoraHTTPServer with correct parameters."""
         # Setup mocks
         mock_handler = MagicMock()
         mock_create_handler.return_value = mock_handler
@@ -116,8 +127,10 @@ class TestServerStartup:
         # Verify handler was created with correct root path
         mock_create_handler.assert_called_once_with(root_path)
 
-        # Verify HTTPServer was created with correct parameters
-        mock_http_server.assert_called_once_with((host, port), mock_handler)
+        # Verify ChoraHTTPServer was created with correct parameters
+        mock_http_server.assert_called_once_with(
+            (host, port), mock_handler, n_threads=DEFAULT_THREADS, reuse_port=False
+        )
 
         # Verify atexit was registered
         mock_atexit.assert_called_once()
@@ -151,6 +164,22 @@ class TestServerStartup:
         assert registered_func.func == cleanup
         assert registered_func.args == (mock_server,)
 
+    def test_start_server_passes_thread_count(
+        self,
+        mock_atexit: MagicMock,
+        mock_create_handler: MagicMock,
+        mock_http_server: MagicMock,
+    ) -> None:
+        """Test that start_server forwards the worker thread count."""
+        mock_http_server.return_value.serve_forever.side_effect = KeyboardInterrupt()
+
+        try:
+            start_server(Path("/test"), "localhost", 8080, 4)
+        except KeyboardInterrupt:
+            pass
+
+        assert mock_http_server.call_args.kwargs["n_threads"] == 4
+
     def test_start_server_calls_serve_forever(
         self,
         mock_atexit: MagicMock,
@@ -172,6 +201,26 @@ class TestServerStartup:
         # Verify serve_forever was called
         mock_server.serve_forever.assert_called_once()
 
+    def test_start_server_reloads_routes_on_sighup(
+        self,
+        mock_atexit: MagicMock,
+        mock_create_handler: MagicMock,
+        mock_http_server: MagicMock,
+    ) -> None:
+        """Test that SIGHUP is wired up to rebuild the route trees."""
+        mock_http_server.return_value.serve_forever.side_effect = KeyboardInterrupt()
+
+        with patch("chora.server.signal.signal") as mock_signal:
+            try:
+                start_server(Path("/test"), "localhost", 8080)
+            except KeyboardInterrupt:
+                pass
+
+        mock_signal.assert_called_once_with(signal.SIGHUP, _reload_on_hangup)
+        with patch("chora.server.reload_routes") as mock_reload:
+            _reload_on_hangup(signal.SIGHUP, None)
+        mock_reload.assert_called_once()
+
 
 class TestServerIntegration:
     """Integration tests for the server."""
@@ -262,6 +311,222 @@ class TestServerIntegration:
         assert sorted(endpoint_nums) == [0, 1, 2]
 
 
+class TestAsgiSelection:
+    """Test choosing the ASGI server."""
+
+    def test_asgi_server_used_when_uvicorn_installed(
+        self, mock_http_server: MagicMock
+    ) -> None:
+        """Test that asgi=True hands off to uvicorn when it is importable."""
+        with (
+            patch("chora.server.importlib.util.find_spec", return_value=object()),
+            patch("chora.server.start_asgi_server") as mock_asgi,
+        ):
+            start_server(Path("/test"), "localhost", 8080, asgi=True)
+
+        mock_asgi.assert_called_once_with(Path("/test"), "localhost", 8080)
+        mock_http_server.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "kwargs,warned",
+        [({}, False), ({"n_threads": 4}, True), ({"reuse_port": True}, True)],
+    )
+    def test_threaded_options_are_reported_as_ignored(
+        self,
+        mock_http_server: MagicMock,
+        capsys: pytest.CaptureFixture[str],
+        kwargs: dict[str, Any],
+        warned: bool,
+    ) -> None:
+        """Test that uvicorn mode warns about options it can't honour."""
+        with (
+            patch("chora.server.importlib.util.find_spec", return_value=object()),
+            patch("chora.server.start_asgi_server"),
+        ):
+            start_server(Path("/test"), "localhost", 8080, asgi=True, **kwargs)
+
+        assert ("only apply to the threaded server" in capsys.readouterr().out) == (
+            warned
+        )
+
+    def test_falls_back_without_uvicorn(
+        self,
+        mock_atexit: MagicMock,
+        mock_create_handler: MagicMock,
+        mock_http_server: MagicMock,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
+        """Test that asgi=True uses the threaded server if uvicorn is missing."""
+        mock_http_server.return_value.serve_forever.side_effect = KeyboardInterrupt()
+
+        with (
+            patch("chora.server.importlib.util.find_spec", return_value=None),
+            patch("chora.server.start_asgi_server") as mock_asgi,
+        ):
+            with pytest.raises(KeyboardInterrupt):
+                start_server(Path("/test"), "localhost", 8080, asgi=True)
+
+        mock_asgi.assert_not_called()
+        mock_http_server.assert_called_once()
+        assert "uvicorn is not installed" in capsys.readouterr().out
+
+
+class TestChoraHTTPServer:
+    """Test the bounded threaded server."""
+
+    def test_server_is_threaded_with_daemon_threads(self) -> None:
+        """Test that request threads don't block interpreter shutdown."""
+        server = ChoraHTTPServer(("127.0.0.1", 0), MagicMock(), n_threads=2)
+        try:
+            assert server.daemon_threads is True
+        finally:
+            server.server_close()
+
+    def test_listen_backlog(self) -> None:
+        """Test that the server asks for a deep accept queue."""
+        assert ChoraHTTPServer.request_queue_size == 4096
+
+    @pytest.mark.skipif(
+        not hasattr(socket, "SO_REUSEPORT"), reason="SO_REUSEPORT unavailable"
+    )
+    def test_reuse_port_lets_servers_share_a_port(self) -> None:
+        """Test that two servers can bind the same port with reuse_port."""
+        first = ChoraHTTPServer(("127.0.0.1", 0), MagicMock(), reuse_port=True)
+        try:
+            port = first.server_address[1]
+            assert first.socket.getsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT)
+            second = ChoraHTTPServer(("127.0.0.1", port), MagicMock(), reuse_port=True)
+            second.server_close()
+        finally:
+            first.server_close()
+
+    def test_port_is_exclusive_by_default(self) -> None:
+        """Test that without reuse_port a second bind to the port fails."""
+        first = ChoraHTTPServer(("127.0.0.1", 0), MagicMock())
+        try:
+            with pytest.raises(OSError):
+                ChoraHTTPServer(("127.0.0.1", first.server_address[1]), MagicMock())
+        finally:
+            first.server_close()
+
+    def test_invalid_thread_count(self) -> None:
+        """Test that a non-positive thread count is rejected."""
+        with pytest.raises(ValueError, match="n_threads"):
+            ChoraHTTPServer(("127.0.0.1", 0), MagicMock(), n_threads=0)
+
+    def test_concurrency_is_bounded(self, tmp_path: Path) -> None:
+        """Test that no more than n_threads requests are handled at once."""
+        n_threads = 2
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+        release = threading.Event()
+        make_static_route(tmp_path / "slow" / "GET", body="done")
+
+        def slow_static(self: Any, directory: str) -> Any:
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            release.wait(2)
+            with lock:
+                active -= 1
+            return read_static(directory)
+
+        server = ChoraHTTPServer(
+            ("127.0.0.1", 0), create_handler(tmp_path), n_threads=n_threads
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        statuses: list[int] = []
+
+        def fetch() -> None:
+            conn = http.client.HTTPConnection("127.0.0.1", server.server_port)
+            try:
+                conn.request("GET", "/slow")
+                statuses.append(conn.getresponse().status)
+            finally:
+                conn.close()
+
+        try:
+            with patch.object(ChoraHTTPRequestHandler, "_static_handler", slow_static):
+                clients = [threading.Thread(target=fetch) for _ in range(n_threads + 2)]
+                for client in clients:
+                    client.start()
+                time.sleep(0.3)
+                assert peak == n_threads
+
+                release.set()
+                for client in clients:
+                    client.join(2)
+            assert statuses == [200] * (n_threads + 2)
+            assert peak == n_threads
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_idle_keep_alive_connections_do_not_hold_slots(
+        self, tmp_path: Path
+    ) -> None:
+        """Test that more idle keep-alive connections than n_threads still work."""
+        n_threads = 2
+        make_static_route(tmp_path / "alive" / "GET", body="alive")
+        server = ChoraHTTPServer(
+            ("127.0.0.1", 0), create_handler(tmp_path), n_threads=n_threads
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        conns = [
+            http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=2)
+            for _ in range(n_threads + 2)
+        ]
+
+        try:
+            for conn in conns:
+                start = time.monotonic()
+                conn.request("GET", "/alive")
+                response = conn.getresponse()
+                assert response.read() == b'"alive"'
+                assert response.getheader("Connection") == "keep-alive"
+                # Earlier connections are idle but still open.
+                assert time.monotonic() - start < 1
+        finally:
+            for conn in conns:
+                conn.close()
+            server.shutdown()
+            server.server_close()
+
+    def test_slow_uploads_do_not_hold_slots(self, tmp_path: Path) -> None:
+        """Test that clients still sending a body don't keep others waiting."""
+        n_threads = 2
+        make_static_route(tmp_path / "alive" / "GET", body="alive")
+        server = ChoraHTTPServer(
+            ("127.0.0.1", 0), create_handler(tmp_path), n_threads=n_threads
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        uploads = []
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_port, timeout=2)
+
+        try:
+            for _ in range(n_threads + 1):
+                upload = socket.create_connection(("127.0.0.1", server.server_port))
+                upload.sendall(
+                    b"POST /alive HTTP/1.1\r\nHost: x\r\n"
+                    b"Content-Length: 100\r\n\r\npartial"
+                )
+                uploads.append(upload)
+            time.sleep(0.2)
+
+            start = time.monotonic()
+            conn.request("GET", "/alive")
+            assert conn.getresponse().read() == b'"alive"'
+            assert time.monotonic() - start < 1
+        finally:
+            conn.close()
+            for upload in uploads:
+                upload.close()
+            server.shutdown()
+            server.server_close()
+
+
 class TestServerErrorHandling:
     """Test server error handling scenarios."""
 
@@ -279,8 +544,8 @@ class TestServerErrorHandling:
     def test_start_server_handles_server_creation_error(
         self, mock_create_handler: MagicMock, mock_http_server: MagicMock
     ) -> None:
-        """Test that start_server handles errors during HTTPServer creation."""
-        # Make HTTPServer raise an exception
+        """Test that start_server handles errors during ChoraHTTPServer creation."""
+        # Make ChoraHTTPServer raise an exception
         mock_http_server.side_effect = OSError("Port already in use")
 
         # start_server should propagate the exception